@@ -0,0 +1,217 @@
+"""
+ASGI entry point (async serving mode).
+
+The hot read endpoints - GET /personnel/all, GET /personnel/<id> and
+GET /section/all - run natively on asyncio with an aiomysql pool, reusing
+the SQL builders of the blueprints so the JSON stays byte-for-byte the same.
+Every other route is forwarded to the Flask app through a WSGI adapter.
+
+    pip install -r requirements-asgi.txt
+    uvicorn asgi:app --app-dir api --host 0.0.0.0 --port 3000
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+from pymysql.err import ProgrammingError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags
+
+from config import db_config, COMPRESSION, POOL_CONFIG, PAGINATION
+from main import app as flask_app
+from personnel.personnel import _group_details, _personnel_details_query, _personnel_page_query
+from section.section import _section_page_query, _preview_query, _attach_preview
+from utils.auth import authorize, cached_user, store_user, user_query, verify_auth_header
+from utils.columnar import COLUMNS_MEDIA_TYPE
+from utils.db import PoolTimeout
+from utils.pagination import paginate
+from utils.scope import cached_sections, is_restricted, scope_key, sections_query, store_sections
+from utils.versions import compute_etag, versions_query
+
+LISTING_TABLES = ("personnel", "personnel_section", "section")
+
+# Same headers flask-cors adds on the WSGI side
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*", "Access-Control-Expose-Headers": "ETag"}
+
+_pool = None
+_flask = WSGIMiddleware(flask_app)
+
+
+def _json(payload, status=200, headers=None):
+    """Serialize exactly like Flask's jsonify (sorted keys, compact, trailing newline)."""
+    body = flask_app.json.dumps(payload, separators=(",", ":")) + "\n"
+    return Response(body, status, {**CORS_HEADERS, **(headers or {})}, media_type="application/json")
+
+
+@asynccontextmanager
+async def _connection():
+    try:
+        conn = await asyncio.wait_for(_pool.acquire(), POOL_CONFIG["checkout_timeout"])
+    except asyncio.TimeoutError:
+        raise PoolTimeout(f"No database connection available after {POOL_CONFIG['checkout_timeout']}s")
+    try:
+        yield conn
+    finally:
+        _pool.release(conn)
+
+
+async def _conditional(request, cur, tables):
+    """(etag, not_modified) from table_versions; (None, False) if the table is missing."""
+    scoped_user, sections = request.state.scope
+    if scoped_user is not None:
+        tables = (*tables, "user_section")
+    try:
+        await cur.execute(*versions_query(tables))
+    except ProgrammingError:
+        return None, False
+    versions = {row["table_name"]: row["version"] for row in await cur.fetchall()}
+    arg_items = request.query_params.multi_items() + ([("~scope", scope_key(sections))] if scoped_user is not None else [])
+    tag = compute_etag(request.url.path, arg_items, versions)
+    return tag, parse_etags(request.headers.get("if-none-match")).contains_weak(tag)
+
+
+async def _user_entry(user_id):
+    """Same cached role / token-version lookup as token_required."""
+    entry = cached_user(user_id)
+    if entry is None:
+        async with _connection() as conn, conn.cursor() as cur:
+            await cur.execute(*user_query(user_id))
+            entry = store_user(user_id, await cur.fetchone())
+    return entry
+
+
+async def _scope(user):
+    """Same (user id to restrict to, section ids) as utils.scope.request_scope()."""
+    if not is_restricted(user):
+        return None, None
+    sections = cached_sections(user["id"])
+    if sections is None:
+        async with _connection() as conn, conn.cursor() as cur:
+            await cur.execute(*sections_query(user["id"]))
+            sections = store_sections(user["id"], await cur.fetchall())
+    return user["id"], sections
+
+
+def _authenticated(view):
+    async def decorated(request):
+        if "format" in request.query_params or COLUMNS_MEDIA_TYPE in request.headers.get("accept", ""):
+            return _flask   # compact format: served by the Flask handlers (any ASGI app is a valid response)
+        user, error = verify_auth_header(request.headers.get("authorization"))
+        try:
+            if not error:
+                user, error = authorize(user, await _user_entry(user.get("id")))
+            if error:
+                return _json({"error": error}, 401)
+            request.state.user = user
+            request.state.scope = await _scope(user)
+            return await view(request)
+        except PoolTimeout as e:
+            return _json({"success": False, "error": str(e)}, 503)
+    return decorated
+
+
+def _with_etag(response, tag):
+    if tag is not None:
+        response.headers["ETag"] = f'"{tag}"'
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _not_modified(tag):
+    return _with_etag(Response(status_code=304, headers=CORS_HEADERS), tag)
+
+
+@_authenticated
+async def personnel_all(request):
+    try:
+        sql, params, limit = _personnel_page_query(request.query_params, request.state.scope[0])
+    except ValueError as e:
+        return _json({"success": False, "error": str(e)}, 400)
+
+    async with _connection() as conn, conn.cursor() as cur:
+        tag, not_modified = await _conditional(request, cur, LISTING_TABLES)
+        if not_modified:
+            return _not_modified(tag)
+        try:
+            await cur.execute(sql, params)
+            rows, next_cursor = paginate(list(await cur.fetchall()), limit, "matricule")
+        except Exception as e:
+            return _json({"success": False, "error": str(e)}, 500)
+    return _with_etag(_json({"success": True, "data": rows, "next_cursor": next_cursor}), tag)
+
+
+@_authenticated
+async def personnel_by_id(request):
+    async with _connection() as conn, conn.cursor() as cur:
+        tag, not_modified = await _conditional(request, cur, LISTING_TABLES)
+        if not_modified:
+            return _not_modified(tag)
+        try:
+            personnel_id = request.path_params["personnel_id"]
+            await cur.execute(*_personnel_details_query([personnel_id], request.state.scope[0]))
+            detail = _group_details(await cur.fetchall()).get(personnel_id)
+        except Exception as e:
+            return _json({"success": False, "error": str(e)}, 500)
+    if not detail:
+        return _json({"success": False, "error": "Personnel not found"}, 404)
+    return _with_etag(_json({"success": True, "data": detail}), tag)
+
+
+@_authenticated
+async def section_all(request):
+    try:
+        sql, params, limit = _section_page_query(request.query_params, request.state.scope[0])
+    except ValueError as e:
+        return _json({"success": False, "error": str(e)}, 400)
+
+    async with _connection() as conn, conn.cursor() as cur:
+        tag, not_modified = await _conditional(request, cur, LISTING_TABLES)
+        if not_modified:
+            return _not_modified(tag)
+        await cur.execute(sql, params)
+        rows, next_cursor = paginate(list(await cur.fetchall()), limit, "id")
+        preview_rows = []
+        if rows:
+            await cur.execute(*_preview_query([r["id"] for r in rows], PAGINATION["preview_size"]))
+            preview_rows = await cur.fetchall()
+    _attach_preview(rows, preview_rows)
+    return _with_etag(_json({"success": True, "data": rows, "next_cursor": next_cursor}), tag)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _pool
+    config = {k: v for k, v in db_config.items() if k != "database"}
+    _pool = await aiomysql.create_pool(
+        **config,
+        db=db_config["database"],
+        minsize=1,
+        maxsize=POOL_CONFIG["max_size"],
+        pool_recycle=POOL_CONFIG["max_age"],
+        autocommit=True,
+        cursorclass=aiomysql.DictCursor,
+    )
+    try:
+        yield
+    finally:
+        _pool.close()
+        await _pool.wait_closed()
+
+
+# Native routes only match GET; OPTIONS preflights and writes fall through to Flask
+app = Starlette(
+    routes=[
+        Route("/personnel/all", personnel_all, methods=["GET"]),
+        Route("/personnel/{personnel_id:int}", personnel_by_id, methods=["GET"]),
+        Route("/section/all", section_all, methods=["GET"]),
+        Mount("/", app=_flask),
+    ],
+    # Flask responses are already compressed (utils/compression.py); the middleware skips them
+    middleware=[Middleware(GZipMiddleware, minimum_size=COMPRESSION["min_size"])] if COMPRESSION["enabled"] else [],
+    lifespan=lifespan,
+)
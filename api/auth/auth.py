@@ -1,12 +1,25 @@
+import pymysql
 from flask import Blueprint, request, jsonify
 from flask_cors import CORS
-import pymysql
-import bcrypt
-from config import db_config
-from utils.auth import generate_token, token_required, roles_required
+from config import SEARCH
+from utils import stats
+from utils.db import get_db, release_db
+from utils.pagination import parse_limit, decode_cursor, paginate
+from utils.passwords import PasswordPoolBusy, hash_password, check_password
+from utils.versions import bump_versions, conditional_get
+from utils.auth import generate_token, invalidate_user, token_required, roles_required
+from utils.links import LinkError, parse_ids
+from utils.scope import invalidate_scope
+from utils.search import like_prefix
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+USER_STATUSES = ("active", "inactive", "suspended")
+
+
+@auth_bp.errorhandler(PasswordPoolBusy)
+def password_pool_busy(e):
+    return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
 
 
 @auth_bp.route("/signup", methods=["POST"])
@@ -21,24 +34,33 @@ def signup():
     if not firstname or not lastname or not email or not password:
         return jsonify({"error": "All fields are required"}), 400
 
-    conn = pymysql.connect(**db_config)
+    conn = get_db()
     cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM users WHERE email = %s", (email,))
+    taken = cursor.fetchone() is not None
+    cursor.close()
+    release_db()  # don't hold a pooled connection while bcrypt runs
+    if taken:
+        return jsonify({"error": "Email already in use"}), 400
 
-    cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-    if cursor.fetchone():
+    hashed_password = hash_password(password)
+
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "INSERT INTO users (firstname, lastname, email, password, role) VALUES (%s, %s, %s, %s, %s)",
+            (firstname, lastname, email, hashed_password, role)
+        )
+    except pymysql.err.IntegrityError:
+        # Same email signed up while we were hashing (UNIQUE key on users.email)
         cursor.close()
-        conn.close()
         return jsonify({"error": "Email already in use"}), 400
-
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    cursor.execute(
-        "INSERT INTO users (firstname, lastname, email, password, role) VALUES (%s, %s, %s, %s, %s)",
-        (firstname, lastname, email, hashed_password.decode("utf-8"), role)
-    )
-    conn.commit()
     user_id = cursor.lastrowid   # ✅ capture inserted user_id
+    stats.user_added(cursor, role)
+    bump_versions(cursor, "users")
+    conn.commit()
     cursor.close()
-    conn.close()
 
     token = generate_token(user_id, email, role)  # ✅ now includes id
     return jsonify({"message": "Signup successful", "token": token}), 200
@@ -50,25 +72,22 @@ def login():
     email = data.get("email")
     password = data.get("password")
 
-    conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+    conn = get_db()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
     user = cursor.fetchone()
     cursor.close()
-    conn.close()
+    release_db()  # don't hold a pooled connection while bcrypt runs
 
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    # Ensure stored hash is bytes when verifying (support both str/bytes from DB)
-    stored_hash = user.get('password')
-    if isinstance(stored_hash, str):
-        stored_hash = stored_hash.encode('utf-8')
-
     role_value = user.get("role", "customer")
 
-    if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
-        token = generate_token(user["id"], user["email"], role_value)  # ✅ pass id
+    if check_password(password, user.get('password')):
+        if user.get("status") not in (None, "active"):
+            return jsonify({"error": "Account disabled"}), 403
+        token = generate_token(user["id"], user["email"], role_value, user.get("token_version", 0))  # ✅ pass id
         return jsonify({
             "message": "Login successful",
             "token": token,
@@ -85,18 +104,82 @@ def login():
 
 
 
+def _users_page_query(args):
+    """
+    (sql, params, limit) for one page of /auth/users, by id. Raises ValueError on bad input.
+
+    ?q= is a prefix of the email, first name or last name: one index-backed branch
+    per column, each cut at the page size, merged with UNION rather than OR.
+    """
+    limit = parse_limit(args)
+    after = decode_cursor(args.get("cursor"), int)
+    q = (args.get("q") or "").strip()[:SEARCH["max_query_length"]]
+    where, params = [], []
+    if args.get("role"):
+        where.append("u.role = %s")
+        params.append(args["role"])
+    if args.get("status"):
+        if args["status"] not in USER_STATUSES:
+            raise ValueError("status must be one of " + ", ".join(USER_STATUSES))
+        where.append("u.status = %s")
+        params.append(args["status"])
+    if after is not None:
+        where.append("u.id > %s")
+        params.append(after)
+
+    columns = "u.id, u.firstname, u.lastname, u.email, u.role, u.status"
+    if not q:
+        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        sql = f"SELECT {columns} FROM users u {where_sql} ORDER BY u.id ASC LIMIT %s"
+        return sql, (*params, limit + 1), limit
+
+    branches, branch_params = [], []
+    for column in ("email", "lastname", "firstname"):
+        branch_where = " AND ".join([f"u.{column} LIKE %s", *where])
+        branches.append(f"(SELECT u.id FROM users u WHERE {branch_where} ORDER BY u.id ASC LIMIT %s)")
+        branch_params += [like_prefix(q), *params, limit + 1]
+    sql = f"""
+        SELECT {columns}
+        FROM ({" UNION ".join(branches)}) m
+        JOIN users u ON u.id = m.id
+        ORDER BY u.id ASC
+        LIMIT %s
+    """
+    return sql, (*branch_params, limit + 1), limit
+
+
+def _users_total(cursor, args):
+    """Users matching ?role= / ?status=, from the user_stats counters; None with ?q=."""
+    if (args.get("q") or "").strip():
+        return None
+    where, params = [], []
+    for column in ("role", "status"):
+        if args.get(column):
+            where.append(f"{column} = %s")
+            params.append(args[column])
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    cursor.execute(f"SELECT CAST(COALESCE(SUM(users), 0) AS SIGNED) AS total FROM user_stats {where_sql}", params)
+    return cursor.fetchone()["total"]
+
+
 @auth_bp.route("/users", methods=["GET"])
 @token_required
 @roles_required(["admin"])
+@conditional_get("users")
 def get_users():
-    """📋 Récupérer tous les utilisateurs"""
-    conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+    """📋 Récupérer les utilisateurs (pagination keyset sur id ; ?q=, ?role=, ?status=)"""
+    try:
+        sql, params, limit = _users_page_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, firstname, lastname, email, role FROM users")
-    users = cursor.fetchall()
+    cursor.execute(sql, params)
+    users, next_cursor = paginate(cursor.fetchall(), limit, "id")
+    total = _users_total(cursor, request.args)
     cursor.close()
-    conn.close()
-    return jsonify({"data": users}), 200
+    return jsonify({"data": users, "next_cursor": next_cursor, "total": total}), 200
 
 
 @auth_bp.route("/users/<int:user_id>", methods=["PUT"])
@@ -108,19 +191,29 @@ def update_user(user_id):
     firstname = data.get("firstname")
     lastname = data.get("lastname")
     role = data.get("role")
+    status = data.get("status")   # optional: active / inactive / suspended
 
     if not firstname or not lastname or not role:
         return jsonify({"error": "firstname, lastname et role requis"}), 400
+    if status is not None and status not in USER_STATUSES:
+        return jsonify({"error": "status invalide"}), 400
 
-    conn = pymysql.connect(**db_config)
+    conn = get_db()
     cursor = conn.cursor()
+    stats.user_changing(cursor, user_id, role, status)
+    # A new role or status revokes the tokens already issued (token_version first:
+    # MariaDB evaluates the assignments left to right, against the old values)
     cursor.execute(
-        "UPDATE users SET firstname=%s, lastname=%s, role=%s WHERE id=%s",
-        (firstname, lastname, role, user_id)
+        """UPDATE users
+           SET token_version = token_version + (NOT (role <=> %s) OR NOT (status <=> COALESCE(%s, status))),
+               firstname=%s, lastname=%s, role=%s, status=COALESCE(%s, status)
+           WHERE id=%s""",
+        (role, status, firstname, lastname, role, status, user_id)
     )
+    bump_versions(cursor, "users")
     conn.commit()
     cursor.close()
-    conn.close()
+    invalidate_user(user_id)
 
     return jsonify({"message": "Utilisateur mis à jour avec succès"}), 200
 
@@ -130,12 +223,76 @@ def update_user(user_id):
 @roles_required(["admin"])
 def delete_user(user_id):
     """🗑 Supprimer un utilisateur"""
-    conn = pymysql.connect(**db_config)
+    conn = get_db()
     cursor = conn.cursor()
+    stats.user_removing(cursor, user_id)
     cursor.execute("DELETE FROM users WHERE id=%s", (user_id,))
+    bump_versions(cursor, "users")
     conn.commit()
     cursor.close()
-    conn.close()
+    invalidate_user(user_id)
+    invalidate_scope(user_id)
     return jsonify({"message": "Utilisateur supprimé avec succès"}), 200
 
 
+@auth_bp.route("/users/<int:user_id>/sections", methods=["GET"])
+@token_required
+@roles_required(["admin"])
+def get_user_sections(user_id):
+    """📋 Sections dont l'utilisateur est responsable (user_section)"""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT s.id, s.code_section, s.label
+        FROM user_section us
+        JOIN section s ON s.id = us.section_id
+        WHERE us.user_id = %s
+        ORDER BY s.label
+    """, (user_id,))
+    sections = cursor.fetchall()
+    cursor.close()
+    return jsonify({"data": sections}), 200
+
+
+@auth_bp.route("/users/<int:user_id>/sections", methods=["PUT"])
+@token_required
+@roles_required(["admin"])
+def update_user_sections(user_id):
+    """✏ Remplacer les sections dont l'utilisateur est responsable ({"section_ids": [...]})"""
+    data = request.json or {}
+    try:
+        section_ids = parse_ids(data.get("section_ids"), "Section")
+    except LinkError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+    if not cursor.fetchone():
+        cursor.close()
+        return jsonify({"error": "Utilisateur introuvable"}), 404
+
+    if section_ids:
+        placeholders = ", ".join(["%s"] * len(section_ids))
+        cursor.execute(f"SELECT id FROM section WHERE id IN ({placeholders})", section_ids)
+        found = {row["id"] for row in cursor.fetchall()}
+        missing = [sid for sid in section_ids if sid not in found]
+        if missing:
+            cursor.close()
+            return jsonify({"error": f"Section with ID {missing[0]} not found"}), 400
+        cursor.execute(
+            f"DELETE FROM user_section WHERE user_id = %s AND section_id NOT IN ({placeholders})",
+            (user_id, *section_ids)
+        )
+        values = ", ".join(["(%s, %s)"] * len(section_ids))
+        cursor.execute(f"INSERT IGNORE INTO user_section (user_id, section_id) VALUES {values}",
+                       [v for sid in section_ids for v in (user_id, sid)])
+    else:
+        cursor.execute("DELETE FROM user_section WHERE user_id = %s", (user_id,))
+    bump_versions(cursor, "user_section")
+    conn.commit()
+    cursor.close()
+    invalidate_scope(user_id)
+    return jsonify({"message": "Sections mises à jour avec succès", "data": section_ids}), 200
+
+
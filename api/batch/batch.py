@@ -0,0 +1,252 @@
+from flask import Blueprint, request, jsonify
+from pymysql.err import DataError, IntegrityError, OperationalError
+from config import BATCH
+from utils import stats
+from utils.cache import invalidate
+from utils.db import PoolTimeout, get_db
+from utils.links import LinkError, parse_ids, sync_links
+from utils.versions import bump_versions
+from utils.auth import token_required, roles_required
+batch_bp = Blueprint("batch", __name__, url_prefix="/batch")
+
+MODES = ("atomic", "best_effort")
+LOCK_WAIT_TIMEOUT = 1205   # ER_LOCK_WAIT_TIMEOUT: only the statement is rolled back
+
+
+class BatchError(Exception):
+    """An operation was rejected; `status` is reported in its result."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _resolve(value, refs):
+    """Ids may be "$ref", the id created by an earlier operation carrying that `ref`."""
+    if isinstance(value, str) and value.startswith("$"):
+        name = value[1:]
+        if name not in refs:
+            raise BatchError(400, f"Unknown reference {value}")
+        if refs[name] is None:
+            raise BatchError(424, f"Reference {value} was not created")
+        return refs[name]
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        raise BatchError(400, "Invalid ID format")
+
+
+def _resolve_list(values, refs, label):
+    if not isinstance(values, list):
+        raise BatchError(400, f"{label} must be a list of IDs")
+    try:
+        return parse_ids([_resolve(v, refs) for v in values], label)
+    except LinkError as e:
+        raise BatchError(400, str(e))
+
+
+def _sync(cur, owner_column, owner_id, ids):
+    try:
+        sync_links(cur, owner_column, owner_id, ids)
+    except LinkError as e:
+        raise BatchError(400, str(e))
+
+
+def _exists(cur, table, row_id):
+    cur.execute(f"SELECT 1 FROM {table} WHERE id = %s", (row_id,))
+    return cur.fetchone() is not None
+
+
+# section: data {code_section, label, unit, type, personnels?}
+def _section(cur, op, row_id, data, refs):
+    if op == "delete":
+        stats.section_removing(cur, row_id)
+        cur.execute("DELETE FROM section WHERE id = %s", (row_id,))
+        if cur.rowcount == 0:
+            raise BatchError(404, "Section not found")
+        return {}
+
+    values = [data.get(k) for k in ("code_section", "label", "unit", "type")]
+    if not all(values):
+        raise BatchError(400, "Code Section, Label, Unit, and Type are required")
+    personnel_ids = _resolve_list(data["personnels"], refs, "Personnel") if "personnels" in data else None
+
+    if op == "create":
+        cur.execute("INSERT INTO section (code_section, label, unit, type) VALUES (%s, %s, %s, %s)", values)
+        row_id = cur.lastrowid
+    else:
+        cur.execute("UPDATE section SET code_section=%s, label=%s, unit=%s, type=%s WHERE id=%s",
+                    (*values, row_id))
+        if cur.rowcount == 0 and not _exists(cur, "section", row_id):
+            raise BatchError(404, "Section not found")
+    if personnel_ids is not None:
+        _sync(cur, "section_id", row_id, personnel_ids)
+    return {"id": row_id}
+
+
+# personnel: data {matricule, nom, qualification, affectation, sections?}
+def _personnel(cur, op, row_id, data, refs):
+    if op == "delete":
+        stats.personnel_removing(cur, row_id)
+        cur.execute("DELETE FROM personnel WHERE id = %s", (row_id,))
+        if cur.rowcount == 0:
+            raise BatchError(404, "Personnel non trouvé")
+        return {}
+
+    values = [data.get(k) for k in ("matricule", "nom", "qualification", "affectation")]
+    if not all(values):
+        raise BatchError(400, "Champs obligatoires manquants")
+    section_ids = _resolve_list(data["sections"], refs, "Section") if "sections" in data else None
+
+    if op == "create":
+        cur.execute("INSERT INTO personnel (matricule, nom, qualification, affectation) VALUES (%s, %s, %s, %s)",
+                    values)
+        row_id = cur.lastrowid
+        stats.personnel_added(cur, [values[3]])
+    else:
+        stats.personnel_moved(cur, row_id, values[3])
+        cur.execute("UPDATE personnel SET matricule=%s, nom=%s, qualification=%s, affectation=%s WHERE id=%s",
+                    (*values, row_id))
+        if cur.rowcount == 0 and not _exists(cur, "personnel", row_id):
+            raise BatchError(404, "Personnel non trouvé")
+    if section_ids is not None:
+        _sync(cur, "personnel_id", row_id, section_ids)
+    return {"id": row_id}
+
+
+# personnel_section: data {personnel_id, section_id}; no update
+def _link(cur, op, row_id, data, refs):
+    if op == "update":
+        raise BatchError(400, "personnel_section supports create and delete only")
+    personnel_id = _resolve(data.get("personnel_id"), refs)
+    section_id = _resolve(data.get("section_id"), refs)
+
+    if op == "delete":
+        where, params = "ps.personnel_id = %s AND ps.section_id = %s", (personnel_id, section_id)
+        stats.unlinking(cur, where, params)
+        cur.execute(f"DELETE ps FROM personnel_section ps WHERE {where}", params)
+        if cur.rowcount == 0:
+            raise BatchError(404, "Link not found")
+        return {}
+
+    # Validates both ends and inserts in one statement; already linked is not an error
+    cur.execute("""
+        INSERT IGNORE INTO personnel_section (personnel_id, section_id)
+        SELECT p.id, s.id FROM personnel p JOIN section s ON s.id = %s
+        WHERE p.id = %s
+    """, (section_id, personnel_id))
+    if cur.rowcount == 0:
+        if not _exists(cur, "personnel", personnel_id):
+            raise BatchError(404, f"Personnel with ID {personnel_id} not found")
+        if not _exists(cur, "section", section_id):
+            raise BatchError(404, f"Section with ID {section_id} not found")
+        return {"created": False}
+    stats.linked(cur, [(personnel_id, section_id)])
+    return {"created": True}
+
+
+HANDLERS = {"section": _section, "personnel": _personnel, "personnel_section": _link}
+
+
+def _run(cur, operation, refs):
+    """Execute one operation; returns the fields of its result."""
+    if not isinstance(operation, dict):
+        raise BatchError(400, "Each operation must be an object")
+    op, entity = operation.get("op"), operation.get("entity")
+    if op not in ("create", "update", "delete"):
+        raise BatchError(400, "op must be create, update or delete")
+    if entity not in HANDLERS:
+        raise BatchError(400, f"entity must be one of {', '.join(HANDLERS)}")
+    data = operation.get("data") or {}
+    if not isinstance(data, dict):
+        raise BatchError(400, "data must be an object")
+    row_id = None
+    if op != "create" and entity != "personnel_section":
+        row_id = _resolve(operation.get("id"), refs)
+    try:
+        return HANDLERS[entity](cur, op, row_id, data, refs)
+    except IntegrityError as e:
+        # Duplicate matricule / code_section
+        raise BatchError(409, _message(e))
+    except DataError as e:
+        # Value too long or out of range for its column
+        raise BatchError(400, _message(e))
+    except OperationalError as e:
+        if e.args[0] != LOCK_WAIT_TIMEOUT:
+            raise
+        raise BatchError(503, _message(e))
+
+
+def _message(e):
+    return e.args[1] if len(e.args) > 1 else str(e)
+
+
+# ✅ Ordered create/update/delete operations in one transaction
+@batch_bp.route("", methods=["POST"])
+@token_required
+@roles_required(["admin"])
+def run_batch():
+    """
+    Body: {"mode": "atomic" | "best_effort", "operations": [{"op", "entity", "id", "data", "ref"}]}.
+    atomic (default) commits everything or nothing; best_effort wraps each operation
+    in a SAVEPOINT and commits the ones that succeeded. One commit either way.
+    """
+    body = request.get_json(silent=True) or {}
+    mode = body.get("mode", "atomic")
+    operations = body.get("operations")
+    if mode not in MODES:
+        return jsonify({"success": False, "error": "mode must be atomic or best_effort"}), 400
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"success": False, "error": "operations must be a non-empty list"}), 400
+    if len(operations) > BATCH["max_operations"]:
+        return jsonify({"success": False, "error": f"At most {BATCH['max_operations']} operations per batch"}), 400
+
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        refs = {}        # ref -> created id (None if its operation failed)
+        results = []
+        failed = None    # index of the first failure (atomic mode stops there)
+
+        for index, operation in enumerate(operations):
+            ref = operation.get("ref") if isinstance(operation, dict) else None
+            if mode == "best_effort":
+                cur.execute("SAVEPOINT batch_op")
+            try:
+                result = _run(cur, operation, refs)
+            except BatchError as e:
+                if mode == "best_effort":
+                    cur.execute("ROLLBACK TO SAVEPOINT batch_op")
+                if ref:
+                    refs[ref] = None
+                results.append({"index": index, "status": e.status, "error": str(e)})
+                if failed is None:
+                    failed = index
+                if mode == "atomic":
+                    break
+                continue
+            if ref:
+                refs[ref] = result.get("id")
+            results.append({"index": index, "status": 201 if operation["op"] == "create" else 200, **result})
+
+        if mode == "atomic" and failed is not None:
+            conn.rollback()
+            cur.close()
+            results += [{"index": i, "status": 424, "error": "Not executed"}
+                        for i in range(failed + 1, len(operations))]
+            return jsonify({"success": False, "committed": False, "failed": failed, "results": results,
+                            "error": f"Operation {failed} failed: {results[failed]['error']}"}), results[failed]["status"]
+
+        succeeded = sum(1 for r in results if "error" not in r)
+        if succeeded:
+            bump_versions(cur, "personnel", "section", "personnel_section")
+        conn.commit()
+        if succeeded:
+            invalidate("personnel", "section", "stats")
+        cur.close()
+        return jsonify({"success": failed is None, "committed": bool(succeeded), "failed": failed,
+                        "results": results}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
@@ -1,13 +1,128 @@
 # config.py
+import os
 import secrets
 
-# Generate a secure secret key
-SECRET_KEY = secrets.token_hex(32)
+# JWT signing key. It must be identical in every worker process (and on every
+# host) or tokens issued by one worker are rejected by another: set SECRET_KEY
+# in the environment. The random fallback is only suitable for a single process.
+SECRET_KEY = os.environ.get("SECRET_KEY") or secrets.token_hex(32)
 
 db_config = {
-    "host": "localhost",
-    "user": "root",
-    "password": "",
-    "database": "comptabilite",
+    "host": os.environ.get("DB_HOST", "localhost"),
+    "user": os.environ.get("DB_USER", "root"),
+    "password": os.environ.get("DB_PASSWORD", ""),
+    "database": os.environ.get("DB_NAME", "comptabilite"),
     "charset": "utf8mb4"
 }
+
+# Connection pool shared by every blueprint (see utils/db.py)
+POOL_CONFIG = {
+    "enabled": True,          # False = one new connection per request (old behaviour)
+    "max_size": 10,           # hard limit of open connections per process
+    "checkout_timeout": 5,    # seconds to wait for a free connection before 503
+    "max_age": 1800,          # recycle connections older than this (seconds)
+    "ping_after": 5,          # ping a borrowed connection idle for longer than this (0 = always)
+    "warm_size": 2,           # connections opened by each worker before it accepts traffic
+}
+
+# Keyset pagination of list endpoints (see utils/pagination.py)
+PAGINATION = {
+    "default_limit": 100,
+    "max_limit": 1000,
+    "preview_size": 10,   # names returned per section by /section/all (plus a total count)
+}
+
+# GET /personnel/search (see migrations/0003_personnel_search.sql)
+SEARCH = {
+    "min_token_size": 3,        # innodb_ft_min_token_size: shorter words fall back to LIKE
+    "max_query_length": 100,
+}
+
+# POST /personnel/bulk
+BULK_IMPORT = {
+    "batch_size": 1000,       # rows validated + inserted per round trip (override with ?batch_size=)
+    "max_batch_size": 10000,
+    "max_errors": 1000,       # rows listed in the error report (the count is always exact)
+}
+
+# POST /batch
+BATCH = {
+    "max_operations": 1000,   # operations per request
+}
+
+# GET /personnel/export and /section/export
+EXPORT = {
+    "net_write_timeout": 600,  # seconds MariaDB waits on a slow download before aborting it
+}
+
+# In-process cache of /personnel/all and /section/all (see utils/cache.py)
+CACHE_CONFIG = {
+    "enabled": True,
+    "ttl": 30,            # seconds; also bounds staleness across worker processes
+    "max_entries": 256,   # distinct (endpoint, query string) results kept (LRU)
+}
+
+# gzip / brotli compression of JSON and text responses (see utils/compression.py)
+COMPRESSION = {
+    "enabled": True,
+    "min_size": 1024,        # bytes; smaller bodies are sent as is
+    "gzip_level": 6,
+    "brotli_quality": 4,     # used when the brotli package is installed and the client accepts br
+}
+
+# Verified JWT payloads kept by token_required (see utils/auth.py)
+TOKEN_CACHE = {
+    "enabled": True,
+    "max_entries": 10000,
+}
+
+# Role / status / token version of each user, re-read by token_required (see utils/auth.py)
+USER_CACHE = {
+    "enabled": True,
+    "ttl": 5,             # seconds; how long another worker may still honour a demoted or deleted user
+    "max_entries": 10000,
+}
+
+# Row-level scoping of the listings by user_section (see utils/scope.py)
+SCOPE = {
+    "unrestricted_roles": ["admin"],   # everyone else only sees the sections they are responsible for
+    "ttl": 30,                         # seconds a user's section set is cached (dropped at once on change)
+    "max_entries": 10000,
+}
+
+# Password hashing (see utils/passwords.py)
+BCRYPT_ROUNDS = 12            # cost factor for new hashes; existing hashes keep their own
+PASSWORD_POOL = {
+    "workers": 2,             # threads hashing/verifying at the same time
+    "max_queue": 16,          # extra requests allowed to wait; beyond that /auth answers 503
+    "timeout": 10,            # seconds a request waits for its hash before 503
+}
+
+# Request / SQL instrumentation, GET /metrics and Server-Timing (see utils/metrics.py)
+METRICS = {
+    "enabled": True,
+    "token": os.environ.get("METRICS_TOKEN"),   # if set, /metrics requires "Authorization: Bearer <token>"
+    "query_warning_threshold": 20,              # log requests running this many SQL statements (N+1)
+}
+
+# Opt-in slow-query log (see utils/slowlog.py); enable with SLOW_QUERY_LOG=1
+SLOW_QUERY_LOG = {
+    "enabled": os.environ.get("SLOW_QUERY_LOG") == "1",
+    "threshold_ms": float(os.environ.get("SLOW_QUERY_MS", 100)),
+    "path": os.environ.get("SLOW_QUERY_PATH", os.path.join(os.path.dirname(__file__), "logs", "slow_queries.jsonl")),
+    "max_bytes": 10 * 1024 * 1024,   # rotate the JSON-lines file after this size
+    "backup_count": 5,
+    "explain": True,                 # EXPLAIN each new statement shape once
+    "max_shapes": 500,               # distinct shapes aggregated in memory per process
+}
+
+# Production launcher (see serve.py / gunicorn.conf.py); every value can be overridden from the environment
+SERVER = {
+    "bind": os.environ.get("API_BIND", "0.0.0.0:3000"),
+    "workers": int(os.environ.get("API_WORKERS", (os.cpu_count() or 1) + 1)),
+    "threads": int(os.environ.get("API_THREADS", 8)),      # keep <= POOL_CONFIG["max_size"]
+    "timeout": int(os.environ.get("API_TIMEOUT", 60)),     # a worker silent for longer is restarted
+    "graceful_timeout": int(os.environ.get("API_GRACEFUL_TIMEOUT", 30)),  # drain time on SIGTERM / reload
+    "keepalive": int(os.environ.get("API_KEEPALIVE", 5)),
+    "max_requests": int(os.environ.get("API_MAX_REQUESTS", 0)),  # recycle workers after N requests (0 = never)
+}
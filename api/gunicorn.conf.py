@@ -0,0 +1,46 @@
+# Gunicorn settings for the production launcher (python api/serve.py, or
+# gunicorn -c api/gunicorn.conf.py main:app from the api/ directory).
+import logging
+import os
+import secrets
+
+log = logging.getLogger("gunicorn.error")
+
+# Tokens must verify on every worker: without a SECRET_KEY in the environment,
+# generate one here, in the master, so every worker inherits the same value.
+# Tokens still become invalid on restart, so set SECRET_KEY for real deployments.
+if not os.environ.get("SECRET_KEY"):
+    os.environ["SECRET_KEY"] = secrets.token_hex(32)
+    log.warning("SECRET_KEY is not set; using a random key shared by this server's workers only")
+
+from config import SERVER  # noqa: E402  (after SECRET_KEY is settled)
+
+bind = SERVER["bind"]
+workers = SERVER["workers"]
+threads = SERVER["threads"]
+worker_class = "gthread"
+timeout = SERVER["timeout"]
+graceful_timeout = SERVER["graceful_timeout"]
+keepalive = SERVER["keepalive"]
+max_requests = SERVER["max_requests"]
+max_requests_jitter = max_requests // 10
+
+# Import the app (blueprints, bcrypt, PyJWT...) once in the master, before forking
+preload_app = True
+
+
+def post_worker_init(worker):
+    # Open DB connections before the worker takes its first request. The pool is
+    # per process (see utils/db.py), so this must run after the fork.
+    from utils import db
+    try:
+        opened = db.warm_pool()
+        worker.log.info("worker %s: %d database connection(s) ready", worker.pid, opened)
+    except Exception as e:
+        worker.log.warning("worker %s: could not pre-open database connections: %s", worker.pid, e)
+
+
+def worker_exit(server, worker):
+    # Runs after in-flight requests have drained (SIGTERM / graceful reload)
+    from utils import db
+    db.close_pool()
@@ -1,39 +1,76 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-import pymysql
-import bcrypt
-from config import db_config, SECRET_KEY
-from utils.auth import generate_token, token_required
+from config import SECRET_KEY, SLOW_QUERY_LOG
+from utils.auth import token_required, roles_required, token_cache_stats, user_cache_stats
+from utils import compression, db, metrics, slowlog
+from utils.cache import cache_stats
+from utils.scope import scope_cache_stats
 from section.section import section_bp
 from personnel.personnel import personnel_bp
 from auth.auth import auth_bp
+from batch.batch import batch_bp
+from stats.stats import stats_bp
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = SECRET_KEY
-CORS(app)
 
-# ✅ No SECRET_KEY here, we now keep it in config.py
-# 🔹 Register blueprints
-app.register_blueprint(section_bp)
-app.register_blueprint(personnel_bp)
-app.register_blueprint(auth_bp)
+def create_app():
+    """Build the Flask application (used by the dev server, serve.py and asgi.py)."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = SECRET_KEY
+    CORS(app, expose_headers=["ETag"])
+    db.init_app(app)
+    metrics.init_app(app)
+    compression.init_app(app)
 
+    # 🔹 Register blueprints
+    app.register_blueprint(section_bp)
+    app.register_blueprint(personnel_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(batch_bp)
+    app.register_blueprint(stats_bp)
 
+    @app.route("/protected", methods=["GET"])
+    @token_required
+    def protected():
+        return jsonify({
+            "id": request.user['id'],
+            "email": request.user['email'],
+            "role": request.user['role'],
+            "message": "Welcome to the protected route!"
+        }), 200
 
+    # 🔹 Runtime statistics (pool sizing, cache hit rate, etc.)
+    @app.route("/internal/stats", methods=["GET"])
+    @token_required
+    @roles_required(["admin"])
+    def internal_stats():
+        return jsonify({
+            "pool": db.pool_stats(),
+            "cache": cache_stats(),
+            "token_cache": token_cache_stats(),
+            "user_cache": user_cache_stats(),
+            "scope_cache": scope_cache_stats(),
+        }), 200
 
+    # 🔹 Slowest SQL statement shapes of this worker (SLOW_QUERY_LOG=1)
+    @app.route("/internal/slow-queries", methods=["GET"])
+    @token_required
+    @roles_required(["admin"])
+    def slow_queries():
+        try:
+            limit = max(1, min(int(request.args.get("limit", 20)), 500))
+        except ValueError:
+            return jsonify({"success": False, "error": "limit must be an integer"}), 400
+        return jsonify({
+            "enabled": SLOW_QUERY_LOG["enabled"],
+            "threshold_ms": SLOW_QUERY_LOG["threshold_ms"],
+            "data": slowlog.top(limit),
+        }), 200
 
+    return app
 
 
-
-@app.route("/protected", methods=["GET"])
-@token_required
-def protected():
-    return jsonify({
-        "id": request.user['id'],
-        "email": request.user['email'],
-        "role": request.user['role'],
-        "message": "Welcome to the protected route!"
-    }), 200
+app = create_app()
 
 if __name__ == "__main__":
+  # Development server only; use serve.py in production
   app.run(host="0.0.0.0", port=3000, debug=True)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations.
+
+Migrations are the files api/migrations/NNNN_description.sql, applied in
+order and recorded in the `schema_migrations` table, so running this again
+only applies what is new:
+
+    python api/migrate.py            # create the database if needed, apply pending migrations
+    python api/migrate.py --status   # list applied / pending migrations
+    python api/migrate.py --target 1 # stop after migration 0001
+
+Each migration should be idempotent (IF NOT EXISTS, INSERT IGNORE...): MariaDB
+commits DDL implicitly, so a migration that fails half-way is re-run from the
+start once fixed. An applied migration must not be edited; add a new one.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+import pymysql
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from config import db_config  # noqa: E402
+
+MIGRATIONS_DIR = os.path.join(HERE, "migrations")
+_FILENAME = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+
+class MigrationError(Exception):
+    pass
+
+
+def split_statements(sql):
+    """
+    Split a script on `;`, ignoring semicolons inside quotes, backticks and
+    comments. Comments are dropped; empty statements are skipped.
+    """
+    statements, current = [], []
+    i, n = 0, len(sql)
+    while i < n:
+        c = sql[i]
+        if c in "'\"`":
+            j = i + 1
+            while j < n:
+                if sql[j] == "\\" and c != "`":
+                    j += 2
+                    continue
+                if sql[j] == c:
+                    if j + 1 < n and sql[j + 1] == c:   # doubled quote
+                        j += 2
+                        continue
+                    break
+                j += 1
+            current.append(sql[i:j + 1])
+            i = j + 1
+        elif sql.startswith("--", i) and (i + 2 == n or sql[i + 2] in " \t\r\n") or c == "#":
+            j = sql.find("\n", i)
+            i = n if j == -1 else j
+        elif sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            i = n if j == -1 else j + 2
+            current.append(" ")
+        elif c == ";":
+            statements.append("".join(current).strip())
+            current = []
+            i += 1
+        else:
+            current.append(c)
+            i += 1
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """[(version, name, path, checksum)] sorted by version."""
+    found = {}
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in found:
+            raise MigrationError(f"Duplicate migration version {version}: {filename}, {found[version][1]}")
+        path = os.path.join(directory, filename)
+        with open(path, "rb") as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        found[version] = (version, match.group(2), path, checksum)
+    return [found[v] for v in sorted(found)]
+
+
+def connect(config=db_config):
+    """Connection to the application database, created first if it does not exist."""
+    server_config = {k: v for k, v in config.items() if k != "database"}
+    conn = pymysql.connect(**server_config, cursorclass=pymysql.cursors.DictCursor)
+    with conn.cursor() as cur:
+        cur.execute(
+            f"CREATE DATABASE IF NOT EXISTS `{config['database']}` "
+            "CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci"
+        )
+    conn.select_db(config["database"])
+    return conn
+
+
+def applied_migrations(conn):
+    with conn.cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+              version INT NOT NULL,
+              name VARCHAR(255) NOT NULL,
+              checksum CHAR(64) NOT NULL,
+              applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+              PRIMARY KEY (version)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci
+        """)
+        cur.execute("SELECT version, name, checksum FROM schema_migrations ORDER BY version")
+        return {row["version"]: row for row in cur.fetchall()}
+
+
+def migrate(conn, target=None, directory=MIGRATIONS_DIR, log=print):
+    """Apply pending migrations up to `target` (inclusive). Returns the versions applied."""
+    applied = applied_migrations(conn)
+    done = []
+    for version, name, path, checksum in discover(directory):
+        if target is not None and version > target:
+            break
+        if version in applied:
+            if applied[version]["checksum"] != checksum:
+                log(f"warning: migration {version:04d}_{name} was edited after being applied")
+            continue
+
+        log(f"Applying {version:04d}_{name}...")
+        with open(path, encoding="utf-8") as f:
+            statements = split_statements(f.read())
+        with conn.cursor() as cur:
+            for statement in statements:
+                try:
+                    cur.execute(statement)
+                except pymysql.Error as e:
+                    conn.rollback()
+                    raise MigrationError(f"{version:04d}_{name}: {e}\n  in: {statement[:200]}") from e
+            cur.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, name, checksum),
+            )
+        conn.commit()
+        done.append(version)
+    return done
+
+
+def status(conn, directory=MIGRATIONS_DIR):
+    applied = applied_migrations(conn)
+    for version, name, _, checksum in discover(directory):
+        row = applied.get(version)
+        state = "pending" if row is None else ("applied (edited since!)" if row["checksum"] != checksum else "applied")
+        print(f"{version:04d}_{name:40} {state}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply the schema migrations in api/migrations/.")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    parser.add_argument("--target", type=int, help="last migration version to apply")
+    args = parser.parse_args(argv)
+
+    conn = connect()
+    try:
+        if args.status:
+            status(conn)
+            return
+        done = migrate(conn, args.target)
+        print(f"{len(done)} migration(s) applied" if done else "Database is up to date")
+    except MigrationError as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,16 @@
 -- --------------------------------------------------------
--- Base de données : comptabilite
+-- Migration 0001 : schéma initial + données d'exemple
+-- Idempotente : une base créée avec l'ancien sql.sql est adoptée telle quelle.
+-- La base elle-même est créée par migrate.py (db_config["database"]).
 -- --------------------------------------------------------
 
 SET SQL_MODE = "NO_AUTO_VALUE_ON_ZERO";
-START TRANSACTION;
 SET time_zone = "+00:00";
 
--- Create database
-CREATE DATABASE IF NOT EXISTS comptabilite;
-USE comptabilite;
-
 -- --------------------------------------------------------
 -- Table : personnel
 -- --------------------------------------------------------
-CREATE TABLE personnel (
+CREATE TABLE IF NOT EXISTS personnel (
   id INT(11) NOT NULL AUTO_INCREMENT,
   matricule VARCHAR(50) NOT NULL UNIQUE,
   nom VARCHAR(50) NOT NULL,
@@ -25,7 +22,7 @@ CREATE TABLE personnel (
 -- --------------------------------------------------------
 -- Table : section (centres de coût)
 -- --------------------------------------------------------
-CREATE TABLE section (
+CREATE TABLE IF NOT EXISTS section (
   id INT(11) NOT NULL AUTO_INCREMENT,
   code_section INT(11) NOT NULL UNIQUE,
   label VARCHAR(255) NOT NULL,
@@ -37,7 +34,7 @@ CREATE TABLE section (
 -- --------------------------------------------------------
 -- Table de liaison : personnel_section
 -- --------------------------------------------------------
-CREATE TABLE personnel_section (
+CREATE TABLE IF NOT EXISTS personnel_section (
   personnel_id INT(11) NOT NULL,
   section_id INT(11) NOT NULL,
   PRIMARY KEY (personnel_id, section_id),
@@ -48,7 +45,7 @@ CREATE TABLE personnel_section (
 -- --------------------------------------------------------
 -- Table : users (application users)
 -- --------------------------------------------------------
-CREATE TABLE users (
+CREATE TABLE IF NOT EXISTS users (
   id INT(11) NOT NULL AUTO_INCREMENT,
   firstname VARCHAR(50) NOT NULL,
   lastname VARCHAR(50) NOT NULL,
@@ -65,7 +62,7 @@ CREATE TABLE users (
 -- --------------------------------------------------------
 -- Table : roles (role-based access control)
 -- --------------------------------------------------------
-CREATE TABLE roles (
+CREATE TABLE IF NOT EXISTS roles (
   id INT(11) NOT NULL AUTO_INCREMENT,
   role_name VARCHAR(50) NOT NULL UNIQUE, -- e.g. admin, accountant, auditor, manager
   description VARCHAR(255) DEFAULT NULL,
@@ -75,7 +72,7 @@ CREATE TABLE roles (
 -- --------------------------------------------------------
 -- Table de liaison : user_roles (many-to-many)
 -- --------------------------------------------------------
-CREATE TABLE user_roles (
+CREATE TABLE IF NOT EXISTS user_roles (
   user_id INT(11) NOT NULL,
   role_id INT(11) NOT NULL,
   PRIMARY KEY (user_id, role_id),
@@ -86,7 +83,7 @@ CREATE TABLE user_roles (
 -- --------------------------------------------------------
 -- Table de liaison : user_section (responsabilité analytique)
 -- --------------------------------------------------------
-CREATE TABLE user_section (
+CREATE TABLE IF NOT EXISTS user_section (
   user_id INT(11) NOT NULL,
   section_id INT(11) NOT NULL,
   PRIMARY KEY (user_id, section_id),
@@ -94,40 +91,54 @@ CREATE TABLE user_section (
   CONSTRAINT fk_section_responsibility FOREIGN KEY (section_id) REFERENCES section (id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+-- --------------------------------------------------------
+-- Table : table_versions (compteurs de modification, utilisés pour les ETag)
+-- --------------------------------------------------------
+CREATE TABLE IF NOT EXISTS table_versions (
+  table_name VARCHAR(64) NOT NULL,
+  version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  PRIMARY KEY (table_name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+INSERT IGNORE INTO table_versions (table_name) VALUES
+('personnel'), ('section'), ('personnel_section'), ('users');
+
 -- --------------------------------------------------------
 -- Insert sample data
 -- --------------------------------------------------------
 
 -- Insert default roles
-INSERT INTO roles (role_name, description) VALUES 
+INSERT IGNORE INTO roles (role_name, description) VALUES 
 ('admin', 'Administrator with full access'),
 ('manager', 'Manager with limited administrative access'),
 ('accountant', 'Accountant with financial data access'),
 ('customer', 'Basic user with limited access');
 
 -- Insert sample admin user (password: admin123)
-INSERT INTO users (firstname, lastname, email, password, role) VALUES 
+INSERT IGNORE INTO users (firstname, lastname, email, password, role) VALUES 
 ('Admin', 'User', 'admin@example.com', '$2b$12$gdeyda9KA7Ov6TCRBU79r.cR9fG7W65zcs.d/ujTlfWcW0.ge9toC', 'admin');
 
 -- Insert sample sections
-INSERT INTO section (code_section, label, unit, type) VALUES 
+INSERT IGNORE INTO section (code_section, label, unit, type) VALUES 
 (100, 'Direction Générale', 'DG', 'Administrative'),
 (200, 'Comptabilité', 'COMPTA', 'Financial'),
 (300, 'Ressources Humaines', 'RH', 'Administrative'),
 (400, 'Production', 'PROD', 'Operational');
 
 -- Insert sample personnel
-INSERT INTO personnel (matricule, nom, qualification, affectation) VALUES 
+INSERT IGNORE INTO personnel (matricule, nom, qualification, affectation) VALUES 
 ('EMP001', 'Dupont Jean', 'Directeur', 'Direction'),
 ('EMP002', 'Martin Marie', 'Comptable', 'Comptabilité'),
 ('EMP003', 'Bernard Paul', 'RH Manager', 'Ressources Humaines'),
 ('EMP004', 'Durand Sophie', 'Opérateur', 'Production');
 
--- Link personnel to sections
-INSERT INTO personnel_section (personnel_id, section_id) VALUES 
-(1, 1), -- Jean Dupont -> Direction Générale
-(2, 2), -- Marie Martin -> Comptabilité
-(3, 3), -- Paul Bernard -> Ressources Humaines
-(4, 4); -- Sophie Durand -> Production
-
-COMMIT;
+-- Link personnel to sections (by business keys, ids may differ on an existing base)
+INSERT IGNORE INTO personnel_section (personnel_id, section_id)
+SELECT p.id, s.id
+FROM personnel p
+JOIN section s ON (p.matricule, s.code_section) IN (
+  ('EMP001', 100), -- Jean Dupont -> Direction Générale
+  ('EMP002', 200), -- Marie Martin -> Comptabilité
+  ('EMP003', 300), -- Paul Bernard -> Ressources Humaines
+  ('EMP004', 400)  -- Sophie Durand -> Production
+);
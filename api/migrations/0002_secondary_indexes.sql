@@ -0,0 +1,19 @@
+-- --------------------------------------------------------
+-- Migration 0002 : index secondaires des filtres et jointures fréquents
+-- --------------------------------------------------------
+
+-- Lien section -> personnel (DELETE ... WHERE section_id = %s, aperçu de /section/all).
+-- La PK (personnel_id, section_id) ne commence pas par section_id ; InnoDB avait créé
+-- un index implicite pour la clé étrangère, remplacé ici par un index explicite couvrant.
+CREATE INDEX IF NOT EXISTS idx_personnel_section_section
+  ON personnel_section (section_id, personnel_id);
+ALTER TABLE personnel_section DROP INDEX IF EXISTS fk_section;
+
+-- Filtre ?affectation= de /personnel/all, déjà dans l'ordre de pagination (matricule)
+CREATE INDEX IF NOT EXISTS idx_personnel_affectation ON personnel (affectation, matricule);
+
+-- Recherche / tri par nom
+CREATE INDEX IF NOT EXISTS idx_personnel_nom ON personnel (nom);
+
+-- Filtre ?type= de /section/all (l'index contient aussi id, l'ordre de pagination)
+CREATE INDEX IF NOT EXISTS idx_section_type ON section (type);
@@ -0,0 +1,8 @@
+-- --------------------------------------------------------
+-- Migration 0003 : recherche plein texte sur le nom du personnel
+-- --------------------------------------------------------
+
+-- Utilisé par GET /personnel/search (MATCH ... AGAINST en mode booléen).
+-- La collation utf8mb4_general_ci de la colonne rend la recherche insensible
+-- à la casse et aux accents : « Helene » trouve « Hélène ».
+ALTER TABLE personnel ADD FULLTEXT INDEX IF NOT EXISTS ft_personnel_nom (nom);
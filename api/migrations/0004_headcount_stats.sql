@@ -0,0 +1,41 @@
+-- --------------------------------------------------------
+-- Migration 0004 : compteurs d'effectifs pour GET /stats
+-- --------------------------------------------------------
+
+-- Tenus à jour par les handlers d'écriture (utils/stats.py), dans la même
+-- transaction que la modification : le tableau de bord lit O(sections) lignes
+-- au lieu d'agréger personnel_section.
+
+-- Nombre de personnels liés à la section
+ALTER TABLE section ADD COLUMN IF NOT EXISTS headcount INT NOT NULL DEFAULT 0;
+-- Nombre de sections du personnel (0 = sans section)
+ALTER TABLE personnel ADD COLUMN IF NOT EXISTS section_count INT NOT NULL DEFAULT 0;
+
+-- Effectif et personnels sans section, par affectation
+CREATE TABLE IF NOT EXISTS affectation_stats (
+  affectation VARCHAR(50) NOT NULL,
+  headcount INT NOT NULL DEFAULT 0,
+  unassigned INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (affectation)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- GET /stats/sections (tri par effectif, ?empty=1) et GET /stats/unassigned
+CREATE INDEX IF NOT EXISTS idx_section_headcount ON section (headcount);
+CREATE INDEX IF NOT EXISTS idx_personnel_section_count ON personnel (section_count, matricule);
+
+-- Valeurs initiales (même calcul que utils/stats.py:rebuild)
+UPDATE section s
+LEFT JOIN (SELECT section_id, COUNT(*) AS n FROM personnel_section GROUP BY section_id) c
+       ON c.section_id = s.id
+SET s.headcount = COALESCE(c.n, 0);
+
+UPDATE personnel p
+LEFT JOIN (SELECT personnel_id, COUNT(*) AS n FROM personnel_section GROUP BY personnel_id) c
+       ON c.personnel_id = p.id
+SET p.section_count = COALESCE(c.n, 0);
+
+DELETE FROM affectation_stats;
+INSERT INTO affectation_stats (affectation, headcount, unassigned)
+SELECT affectation, COUNT(*), SUM(section_count = 0)
+FROM personnel
+GROUP BY affectation;
@@ -0,0 +1,8 @@
+-- --------------------------------------------------------
+-- Migration 0005 : version des jetons par utilisateur
+-- --------------------------------------------------------
+
+-- Recopiée dans le claim "ver" du JWT au login. token_required refuse un jeton
+-- dont la version ne correspond plus : incrémentée par PUT /auth/users/<id>
+-- quand le rôle ou le statut change, elle révoque les jetons déjà émis.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INT NOT NULL DEFAULT 0;
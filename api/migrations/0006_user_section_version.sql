@@ -0,0 +1,8 @@
+-- --------------------------------------------------------
+-- Migration 0006 : version de user_section
+-- --------------------------------------------------------
+
+-- Les listes sont restreintes aux sections dont l'utilisateur est responsable
+-- (utils/scope.py) : l'ETag et le cache d'un utilisateur restreint dépendent
+-- donc aussi de user_section, incrémentée par PUT /auth/users/<id>/sections.
+INSERT IGNORE INTO table_versions (table_name) VALUES ('user_section');
@@ -0,0 +1,27 @@
+-- --------------------------------------------------------
+-- Migration 0007 : liste paginée des utilisateurs (GET /auth/users)
+-- --------------------------------------------------------
+
+-- Nombre d'utilisateurs par (rôle, statut), tenu à jour par signup / update_user /
+-- delete_user (utils/stats.py) : le total de la liste se lit ici au lieu d'un
+-- COUNT(*) sur users à chaque page. NULL est stocké comme ''.
+CREATE TABLE IF NOT EXISTS user_stats (
+  role VARCHAR(50) NOT NULL,
+  status VARCHAR(20) NOT NULL,
+  users INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (role, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Filtres ?role= / ?status= dans l'ordre du curseur (id)
+CREATE INDEX IF NOT EXISTS idx_users_role ON users (role, id);
+CREATE INDEX IF NOT EXISTS idx_users_status ON users (status, id);
+-- Recherche par préfixe du nom (l'e-mail a déjà son index UNIQUE)
+CREATE INDEX IF NOT EXISTS idx_users_lastname ON users (lastname);
+CREATE INDEX IF NOT EXISTS idx_users_firstname ON users (firstname);
+
+-- Valeurs initiales (même calcul que utils/stats.py:rebuild)
+DELETE FROM user_stats;
+INSERT INTO user_stats (role, status, users)
+SELECT COALESCE(role, ''), COALESCE(status, ''), COUNT(*)
+FROM users
+GROUP BY COALESCE(role, ''), COALESCE(status, '');
@@ -1,86 +1,347 @@
 from flask import Blueprint, request, jsonify, send_file
-import pymysql
 import io
+import csv
+import json
+import re
+import pymysql
 from datetime import datetime
 from utils.auth import token_required, roles_required
-#import pandas as pd  # keep for Excel import/export
-from config import db_config
+from config import BULK_IMPORT, PAGINATION, SEARCH
+from utils.cache import cached_listing, invalidate
+from utils.db import PoolTimeout, get_db, iter_query
+from utils.export import export_response, merge_last_column
+from utils import stats
+from utils.links import LinkError, parse_ids, sync_links
+from utils.pagination import list_response, parse_limit, decode_cursor
+from utils.scope import link_condition, personnel_condition, scope_user
+from utils.search import like_prefix
+from utils.versions import bump_versions, conditional_get
 
 personnel_bp = Blueprint("personnel", __name__, url_prefix="/personnel")
 
-# ✅ Get all personnel with sections
+
+def _personnel_filters(args, scope_user=None):
+    """WHERE clauses + params for the ?affectation=, ?qualification=, ?section_id= filters
+    (and the sections of `scope_user`, see utils/scope.py)."""
+    where, params = [], []
+    if scope_user is not None:
+        condition, condition_params = personnel_condition("p.id", scope_user)
+        where.append(condition)
+        params.extend(condition_params)
+    if args.get("affectation"):
+        where.append("p.affectation = %s")
+        params.append(args["affectation"])
+    if args.get("qualification"):
+        where.append("p.qualification = %s")
+        params.append(args["qualification"])
+    if args.get("section_id"):
+        where.append("""EXISTS (SELECT 1 FROM personnel_section f
+                                WHERE f.personnel_id = p.id AND f.section_id = %s)""")
+        params.append(int(args["section_id"]))
+    return where, params
+
+
+def _personnel_page_query(args, scope_user=None):
+    """(sql, params, limit) for one page of /personnel/all. Raises ValueError on bad input."""
+    limit = parse_limit(args)
+    after = decode_cursor(args.get("cursor"), str)
+    where, params = _personnel_filters(args, scope_user)
+    if after is not None:
+        where.append("p.matricule > %s")
+        params.append(after)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+
+    # Page first on the matricule index, then aggregate sections for that page only
+    link_sql, link_params = link_condition("ps.section_id", scope_user)
+    sql = f"""
+        SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation,
+               GROUP_CONCAT(s.label SEPARATOR ', ') AS sections
+        FROM (
+            SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation
+            FROM personnel p
+            {where_sql}
+            ORDER BY p.matricule ASC
+            LIMIT %s
+        ) p
+        LEFT JOIN personnel_section ps ON p.id = ps.personnel_id AND {link_sql}
+        LEFT JOIN section s ON ps.section_id = s.id
+        GROUP BY p.id
+        ORDER BY p.matricule ASC
+    """
+    return sql, (*params, limit + 1, *link_params), limit
+
+
+def _personnel_details_query(ids, scope_user=None):
+    """(sql, params) returning one row per (personnel, linked section) for `ids`."""
+    placeholders = ", ".join(["%s"] * len(ids))
+    scope_sql, scope_params = personnel_condition("p.id", scope_user) if scope_user is not None else ("TRUE", [])
+    link_sql, link_params = link_condition("ps.section_id", scope_user)
+    sql = f"""
+        SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation,
+               s.id AS section_id, s.code_section, s.label
+        FROM personnel p
+        LEFT JOIN personnel_section ps ON p.id = ps.personnel_id AND {link_sql}
+        LEFT JOIN section s ON ps.section_id = s.id
+        WHERE p.id IN ({placeholders}) AND {scope_sql}
+        ORDER BY p.id, s.label
+    """
+    return sql, (*link_params, *ids, *scope_params)
+
+
+def _group_details(rows):
+    """{id: personnel detail with `sections: [{id, code_section, label}]`} from the rows above."""
+    details = {}
+    for row in rows:
+        detail = details.get(row["id"])
+        if detail is None:
+            detail = details[row["id"]] = {
+                k: row[k] for k in ("id", "matricule", "nom", "qualification", "affectation")
+            }
+            detail["sections"] = []
+        if row["section_id"] is not None:
+            detail["sections"].append(
+                {"id": row["section_id"], "code_section": row["code_section"], "label": row["label"]}
+            )
+    return details
+
+
+# ✅ Get all personnel with sections (keyset pagination on matricule; ?format=columns)
 @personnel_bp.route("/all", methods=["GET"])
 @token_required
+@conditional_get("personnel", "personnel_section", "section")
+@cached_listing("personnel")
 def get_personnel():
     try:
-        conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
-        cur = conn.cursor()
+        sql, params, limit = _personnel_page_query(request.args, scope_user())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
-        cur.execute("""
-            SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation,
-                   GROUP_CONCAT(s.label SEPARATOR ', ') AS sections
+    try:
+        return list_response(sql, params, limit, ("matricule",))
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+_FT_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+def _personnel_search_query(args, scope_user=None):
+    """
+    (sql, params, limit) for one page of /personnel/search. Raises ValueError on bad input.
+
+    Each way of matching is a separate index-backed branch (matricule prefix on
+    its unique key, FULLTEXT on nom, nom prefix); the branches are merged with
+    UNION ALL rather than OR, which would defeat the indexes. Results are ranked
+    by score, then id, and paged with a (score, id) cursor.
+    """
+    limit = parse_limit(args)
+    after = decode_cursor(args.get("cursor"), (float, int))
+    q = " ".join((args.get("q") or "").split())[:SEARCH["max_query_length"]]
+    section = (args.get("section") or "").strip()
+    if not q and not section:
+        raise ValueError("q or section is required")
+
+    # Scores are DOUBLE in every branch so the (score, id) cursor round-trips through JSON
+    branches, params = [], []
+    if q:
+        terms = [t for t in (_FT_OPERATORS.sub(" ", w).strip() for w in q.split()) if t]
+        long_terms = [t for t in terms if len(t) >= SEARCH["min_token_size"]]
+        short_terms = [t for t in terms if len(t) < SEARCH["min_token_size"]]
+        if len(terms) == 1:
+            branches.append("SELECT id, IF(matricule = %s, 200E0, 100E0) AS score FROM personnel WHERE matricule LIKE %s")
+            params += [q, like_prefix(q)]
+        if long_terms:
+            # Every term must match, each as a word prefix: "hel dup" -> "+hel* +dup*"
+            boolean = " ".join(f"+{t}*" for t in long_terms)
+            short_sql = "".join(" AND nom LIKE %s" for _ in short_terms)
+            branches.append(f"""
+                SELECT id, MATCH(nom) AGAINST (%s IN BOOLEAN MODE) * 10 + IF(nom LIKE %s, 20, 0) AS score
+                FROM personnel
+                WHERE MATCH(nom) AGAINST (%s IN BOOLEAN MODE){short_sql}
+            """)
+            params += [boolean, like_prefix(q), boolean]
+            params += ["%" + like_prefix(t) for t in short_terms]
+        elif terms:
+            # Words shorter than the FULLTEXT token size: prefix of the whole name only
+            branches.append("SELECT id, 20E0 AS score FROM personnel WHERE nom LIKE %s")
+            params.append(like_prefix(q))
+        if not branches:
+            raise ValueError("q contains no searchable characters")
+    else:
+        branches.append("""
+            SELECT ps.personnel_id AS id, 0E0 AS score
+            FROM personnel_section ps JOIN section s ON s.id = ps.section_id
+            WHERE s.label = %s
+        """)
+        params.append(section)
+
+    where, having = [], []
+    if scope_user is not None:
+        condition, condition_params = personnel_condition("c.id", scope_user)
+        where.append(condition)
+        params += condition_params
+    if q and section:
+        where.append("""EXISTS (SELECT 1 FROM personnel_section f JOIN section fs ON fs.id = f.section_id
+                                WHERE f.personnel_id = c.id AND fs.label = %s)""")
+        params.append(section)
+    if after is not None:
+        last_score, last_id = after
+        having.append("relevance < %s OR (relevance = %s AND c.id > %s)")
+        params += [last_score, last_score, last_id]
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    having_sql = ("HAVING " + " AND ".join(having)) if having else ""
+    union = " UNION ALL ".join(branches)
+    link_sql, link_params = link_condition("ps.section_id", scope_user)
+
+    sql = f"""
+        SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation,
+               GROUP_CONCAT(s.label SEPARATOR ', ') AS sections, r.relevance AS score
+        FROM (
+            SELECT c.id, ROUND(MAX(c.score), 6) AS relevance
+            FROM ({union}) c
+            {where_sql}
+            GROUP BY c.id
+            {having_sql}
+            ORDER BY relevance DESC, c.id ASC
+            LIMIT %s
+        ) r
+        JOIN personnel p ON p.id = r.id
+        LEFT JOIN personnel_section ps ON p.id = ps.personnel_id AND {link_sql}
+        LEFT JOIN section s ON ps.section_id = s.id
+        GROUP BY p.id, r.relevance
+        ORDER BY r.relevance DESC, p.id ASC
+    """
+    return sql, (*params, limit + 1, *link_params), limit
+
+
+# ✅ Search personnel (?q= matricule prefix / accent-insensitive name words, ?section= label)
+@personnel_bp.route("/search", methods=["GET"])
+@token_required
+@conditional_get("personnel", "personnel_section", "section")
+@cached_listing("personnel")
+def search_personnel():
+    try:
+        sql, params, limit = _personnel_search_query(request.args, scope_user())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    try:
+        return list_response(sql, params, limit, ("score", "id"))
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ✅ Export personnel (CSV or XLSX, streamed from an unbuffered cursor)
+@personnel_bp.route("/export", methods=["GET"])
+@token_required
+def export_personnel():
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in ("csv", "xlsx"):
+        return jsonify({"success": False, "error": "format must be csv or xlsx"}), 400
+    try:
+        where, params = _personnel_filters(request.args, scope_user())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    link_sql, link_params = link_condition("ps.section_id", scope_user())
+
+    try:
+        rows = iter_query(f"""
+            SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation, s.label
             FROM personnel p
-            LEFT JOIN personnel_section ps ON p.id = ps.personnel_id
+            LEFT JOIN personnel_section ps ON p.id = ps.personnel_id AND {link_sql}
             LEFT JOIN section s ON ps.section_id = s.id
-            GROUP BY p.id
-            ORDER BY p.matricule ASC
-        """)
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        return jsonify({"success": True, "data": rows}), 200
+            {where_sql}
+            ORDER BY p.matricule ASC, s.label ASC
+        """, (*link_params, *params))
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
+    columns = ["id", "matricule", "nom", "qualification", "affectation", "sections"]
+    return export_response(columns, merge_last_column(rows), fmt, "personnel")
 
 
 # ✅ Get personnel by ID (with sections)
 @personnel_bp.route("/<int:personnel_id>", methods=["GET"])
 @token_required
+@conditional_get("personnel", "personnel_section", "section")
 def get_personnel_by_id(personnel_id):
     try:
-        conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        conn = get_db()
         cur = conn.cursor()
 
-        cur.execute("""
-            SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation,
-                   GROUP_CONCAT(s.label SEPARATOR ', ') AS sections
-            FROM personnel p
-            LEFT JOIN personnel_section ps ON p.id = ps.personnel_id
-            LEFT JOIN section s ON ps.section_id = s.id
-            WHERE p.id = %s
-            GROUP BY p.id
-        """, (personnel_id,))
-        row = cur.fetchone()
-        cur.close()  
-        conn.close()
-
-        if row:
-            return jsonify({"success": True, "data": row}), 200
+        cur.execute(*_personnel_details_query([personnel_id], scope_user()))
+        detail = _group_details(cur.fetchall()).get(personnel_id)
+        cur.close()
+
+        if detail:
+            return jsonify({"success": True, "data": detail}), 200
         else:
             return jsonify({"success": False, "error": "Personnel not found"}), 404
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-# ✅ Get section IDs for personnel
+# ✅ Get several personnel details at once (?ids=1,2,3), in the requested order
+@personnel_bp.route("", methods=["GET"])
+@token_required
+@conditional_get("personnel", "personnel_section", "section")
+def get_personnel_batch():
+    try:
+        ids = parse_ids(request.args.get("ids", "").split(","), "Personnel", keep_order=True)
+    except LinkError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if not ids:
+        return jsonify({"success": False, "error": "ids is required (e.g. ?ids=1,2,3)"}), 400
+    if len(ids) > PAGINATION["max_limit"]:
+        return jsonify({"success": False, "error": f"At most {PAGINATION['max_limit']} ids per request"}), 400
+
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        cur.execute(*_personnel_details_query(ids, scope_user()))
+        details = _group_details(cur.fetchall())
+        cur.close()
+        return jsonify({
+            "success": True,
+            "data": [details[i] for i in ids if i in details],
+            "missing": [i for i in ids if i not in details],
+        }), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ✅ Get section IDs for personnel (also part of GET /personnel/<id>)
 @personnel_bp.route("/<int:personnel_id>/sections", methods=["GET"])
 @token_required
 def get_personnel_sections(personnel_id):
     try:
-        conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        conn = get_db()
         cur = conn.cursor()
 
-        cur.execute("""
+        # Only the links to the user's own sections; personnel outside their scope have none
+        scope_sql, scope_params = link_condition("section_id", scope_user())
+        cur.execute(f"""
             SELECT section_id 
             FROM personnel_section 
-            WHERE personnel_id = %s
-        """, (personnel_id,))
+            WHERE personnel_id = %s AND {scope_sql}
+        """, (personnel_id, *scope_params))
         rows = cur.fetchall()
         cur.close()
-        conn.close()
         
         section_ids = [row['section_id'] for row in rows]
         return jsonify({"success": True, "data": section_ids}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -101,14 +362,13 @@ def add_personnel():
         if not all([matricule, nom, qualification, affectation]):
             return jsonify({"success": False, "error": "Champs obligatoires manquants"}), 400
 
-        conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        conn = get_db()
         cur = conn.cursor()
 
         # Check unique matricule
         cur.execute("SELECT id FROM personnel WHERE matricule = %s", (matricule,))
         if cur.fetchone():
             cur.close()
-            conn.close()
             return jsonify({"success": False, "error": "Ce matricule existe déjà"}), 400
 
         cur.execute("""
@@ -116,31 +376,236 @@ def add_personnel():
             VALUES (%s, %s, %s, %s)
         """, (matricule, nom, qualification, affectation))
         new_id = cur.lastrowid
+        stats.personnel_added(cur, [affectation])
 
-        # Insert section links with validation
+        # Insert section links (validated with a single query)
         if section_ids:
-            # Convert to integers and validate
             try:
-                section_ids = [int(sid) for sid in section_ids if sid]
-            except (ValueError, TypeError):
+                sync_links(cur, "personnel_id", new_id, parse_ids(section_ids, "Section"))
+            except LinkError as e:
                 cur.close()
-                conn.close()
-                return jsonify({"success": False, "error": "Invalid section ID format"}), 400
-                
-            for sid in section_ids:
-                # Validate section exists before inserting
-                cur.execute("SELECT id FROM section WHERE id = %s", (sid,))
-                if cur.fetchone():
-                    cur.execute("INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)", (new_id, sid))
-                else:
-                    cur.close()
-                    conn.close()
-                    return jsonify({"success": False, "error": f"Section with ID {sid} not found"}), 400
+                return jsonify({"success": False, "error": str(e)}), 400
 
+        bump_versions(cur, "personnel", "personnel_section")
         conn.commit()
+        invalidate("personnel", "section", "stats")
         cur.close()
-        conn.close()
         return jsonify({"success": True, "id": new_id, "message": "Personnel ajouté avec succès"}), 201
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ✅ Bulk import (CSV or JSON lines, streamed)
+BULK_FIELDS = ("matricule", "nom", "qualification", "affectation")
+
+
+def _bulk_source():
+    """(text stream, format) for the upload: raw body or multipart field `file`."""
+    fmt = (request.args.get("format") or "").lower()
+    if "file" in request.files:
+        upload = request.files["file"]
+        stream = upload.stream
+        if not fmt:
+            fmt = "jsonl" if upload.filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+    else:
+        stream = request.stream
+        if not fmt:
+            mimetype = request.mimetype or ""
+            fmt = "jsonl" if mimetype in ("application/x-ndjson", "application/jsonl", "application/json-lines") else "csv"
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("format must be csv or jsonl")
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""), fmt
+
+
+def _bulk_records(text, fmt):
+    """Yield (row number, record dict or None, parse error or None) without loading the file."""
+    if fmt == "csv":
+        for n, record in enumerate(csv.DictReader(text), start=1):
+            sections = record.get("sections") or ""
+            record["sections"] = [s for s in sections.replace("|", ";").split(";") if s.strip()]
+            yield n, record, None
+        return
+    n = 0
+    for line in text:
+        if not line.strip():
+            continue
+        n += 1
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            yield n, record, None
+        except ValueError as e:
+            yield n, None, f"Invalid JSON: {e}"
+
+
+def _in_clause(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _matricule_key(matricule):
+    """Duplicate-detection key: the UNIQUE key on matricule is case-insensitive (utf8mb4_general_ci)."""
+    return matricule.casefold()
+
+
+def _insert_personnel(cur, batch, rows, seen, report):
+    """
+    INSERT `rows` (matricule, nom, qualification, affectation) in one executemany; if the
+    UNIQUE key still rejects one (the collation also folds accents), insert them one
+    by one and report the duplicates. Returns the indexes of the inserted rows.
+    """
+    sql = "INSERT INTO personnel (matricule, nom, qualification, affectation) VALUES (%s, %s, %s, %s)"
+    cur.execute("SAVEPOINT bulk_batch")
+    try:
+        cur.executemany(sql, rows)
+        return list(range(len(rows)))
+    except pymysql.err.IntegrityError:
+        cur.execute("ROLLBACK TO SAVEPOINT bulk_batch")
+
+    inserted = []
+    for i, ((n, _), row) in enumerate(zip(batch, rows)):
+        cur.execute("SAVEPOINT bulk_row")
+        try:
+            cur.execute(sql, row)
+            inserted.append(i)
+        except pymysql.err.IntegrityError:
+            cur.execute("ROLLBACK TO SAVEPOINT bulk_row")
+            report(n, row[0], "Ce matricule existe déjà")
+            seen.discard(_matricule_key(row[0]))
+    return inserted
+
+
+def _import_batch(cur, batch, seen, known_sections, report):
+    """Validate one batch with set-based queries, then insert it with executemany."""
+    matricules = [rec["matricule"] for _, rec in batch]
+    cur.execute(f"SELECT matricule FROM personnel WHERE matricule IN ({_in_clause(matricules)})", matricules)
+    existing = {_matricule_key(row["matricule"]) for row in cur.fetchall()}
+
+    wanted = {sid for _, rec in batch for sid in rec["sections"]} - known_sections
+    if wanted:
+        cur.execute(f"SELECT id FROM section WHERE id IN ({_in_clause(wanted)})", list(wanted))
+        known_sections.update(row["id"] for row in cur.fetchall())
+
+    valid = []
+    for n, rec in batch:
+        if _matricule_key(rec["matricule"]) in existing:
+            report(n, rec["matricule"], "Ce matricule existe déjà")
+            seen.discard(_matricule_key(rec["matricule"]))
+            continue
+        missing = [sid for sid in rec["sections"] if sid not in known_sections]
+        if missing:
+            report(n, rec["matricule"], f"Section with ID {missing[0]} not found")
+            seen.discard(_matricule_key(rec["matricule"]))
+            continue
+        valid.append((n, rec))
+
+    if not valid:
+        return 0
+    inserted = _insert_personnel(cur, valid, [tuple(rec[f] for f in BULK_FIELDS) for _, rec in valid],
+                                 seen, report)
+    valid = [valid[i][1] for i in inserted]
+    if not valid:
+        return 0
+    stats.personnel_added(cur, [rec["affectation"] for rec in valid])
+
+    linked = [rec for rec in valid if rec["sections"]]
+    if linked:
+        keys = [rec["matricule"] for rec in linked]
+        cur.execute(f"SELECT id, matricule FROM personnel WHERE matricule IN ({_in_clause(keys)})", keys)
+        ids = {_matricule_key(row["matricule"]): row["id"] for row in cur.fetchall()}
+        pairs = [(ids[_matricule_key(rec["matricule"])], sid) for rec in linked for sid in rec["sections"]]
+        cur.executemany("INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)", pairs)
+        stats.linked(cur, pairs)
+    return len(valid)
+
+
+@personnel_bp.route("/bulk", methods=["POST"])
+@token_required
+@roles_required(["admin"])
+def bulk_import_personnel():
+    """
+    Import many personnel in one transaction.
+    Body: CSV (header matricule,nom,qualification,affectation,sections with sections
+    separated by ';') or JSON lines, raw or as multipart field `file`.
+    ?atomic=1 rolls everything back if any row is rejected.
+    """
+    try:
+        text, fmt = _bulk_source()
+        batch_size = min(int(request.args.get("batch_size") or BULK_IMPORT["batch_size"]),
+                         BULK_IMPORT["max_batch_size"])
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    atomic = request.args.get("atomic") in ("1", "true")
+
+    errors = []
+    rejected = 0
+
+    def report(n, matricule, message):
+        # Batch checks report rows after later parse errors: keep the lowest row numbers
+        nonlocal rejected
+        rejected += 1
+        errors.append({"row": n, "matricule": matricule, "error": message})
+        if len(errors) >= 2 * BULK_IMPORT["max_errors"]:
+            errors.sort(key=lambda e: e["row"])
+            del errors[BULK_IMPORT["max_errors"]:]
+
+    def error_report():
+        errors.sort(key=lambda e: e["row"])
+        return errors[:BULK_IMPORT["max_errors"]]
+
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        inserted = 0
+        seen = set()            # matricules accepted so far (duplicates inside the upload)
+        known_sections = set()  # section IDs already validated
+        batch = []
+
+        for n, rec, parse_error in _bulk_records(text, fmt):
+            if parse_error:
+                report(n, None, parse_error)
+                continue
+            rec = {**rec, **{f: str(rec.get(f) or "").strip() for f in BULK_FIELDS}}
+            if not all(rec[f] for f in BULK_FIELDS):
+                report(n, rec["matricule"] or None, "Champs obligatoires manquants")
+                continue
+            try:
+                rec["sections"] = sorted({int(sid) for sid in (rec.get("sections") or []) if sid})
+            except (ValueError, TypeError):
+                report(n, rec["matricule"], "Invalid section ID format")
+                continue
+            if _matricule_key(rec["matricule"]) in seen:
+                report(n, rec["matricule"], "Matricule en double dans le fichier")
+                continue
+            seen.add(_matricule_key(rec["matricule"]))
+            batch.append((n, rec))
+            if len(batch) >= batch_size:
+                inserted += _import_batch(cur, batch, seen, known_sections, report)
+                batch = []
+        if batch:
+            inserted += _import_batch(cur, batch, seen, known_sections, report)
+
+        if atomic and rejected:
+            conn.rollback()
+            cur.close()
+            errors = error_report()
+            return jsonify({"success": False, "inserted": 0, "rejected": rejected,
+                            "errors": errors, "truncated": rejected > len(errors),
+                            "error": "Import annulé : des lignes sont invalides"}), 400
+
+        bump_versions(cur, "personnel", "personnel_section")
+        conn.commit()
+        invalidate("personnel", "section", "stats")
+        cur.close()
+        errors = error_report()
+        return jsonify({"success": True, "inserted": inserted, "rejected": rejected,
+                        "errors": errors, "truncated": rejected > len(errors)}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -164,7 +629,7 @@ def update_personnel(personnel_id):
         if not all([matricule, nom, qualification, affectation]):
             return jsonify({"success": False, "error": "Champs obligatoires manquants"}), 400
 
-        conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        conn = get_db()
         cur = conn.cursor()
 
         # Check if personnel exists first
@@ -173,7 +638,6 @@ def update_personnel(personnel_id):
         
         if not current_personnel:
             cur.close()
-            conn.close()
             return jsonify({"success": False, "error": "Personnel non trouvé"}), 404
 
         # Check duplicate matricule only if matricule is being changed
@@ -181,10 +645,10 @@ def update_personnel(personnel_id):
             cur.execute("SELECT id FROM personnel WHERE matricule = %s", (matricule,))
             if cur.fetchone():
                 cur.close()
-                conn.close()
                 return jsonify({"success": False, "error": "Ce matricule existe déjà"}), 400
 
         # Update personnel
+        stats.personnel_moved(cur, personnel_id, affectation)
         cur.execute("""
             UPDATE personnel 
             SET matricule = %s, nom = %s, qualification = %s, affectation = %s
@@ -194,36 +658,20 @@ def update_personnel(personnel_id):
         # Note: cur.rowcount can be 0 when values are unchanged. We already checked existence above,
         # so do not treat 0 affected rows as not found. Proceed to update section links below.
 
-        # Reset and reinsert sections
-        cur.execute("DELETE FROM personnel_section WHERE personnel_id = %s", (personnel_id,))
-        
-        # Only insert sections if provided
-        if section_ids:
-            # Convert to integers and validate
-            try:
-                section_ids = [int(sid) for sid in section_ids if sid]
-            except (ValueError, TypeError):
-                cur.close()
-                conn.close()
-                return jsonify({"success": False, "error": "Invalid section ID format"}), 400
-                
-            for sid in section_ids:
-                # Validate section exists before inserting
-                cur.execute("SELECT id FROM section WHERE id = %s", (sid,))
-                if cur.fetchone():
-                    cur.execute(
-                        "INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)",
-                        (personnel_id, sid),
-                    )
-                else:
-                    cur.close()
-                    conn.close()
-                    return jsonify({"success": False, "error": f"Section with ID {sid} not found"}), 400
+        # Apply only the difference with the current links
+        try:
+            sync_links(cur, "personnel_id", personnel_id, parse_ids(section_ids, "Section"))
+        except LinkError as e:
+            cur.close()
+            return jsonify({"success": False, "error": str(e)}), 400
 
+        bump_versions(cur, "personnel", "personnel_section")
         conn.commit()
+        invalidate("personnel", "section", "stats")
         cur.close()
-        conn.close()
         return jsonify({"success": True, "message": "Personnel modifié avec succès"}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -234,18 +682,21 @@ def update_personnel(personnel_id):
 @roles_required(["admin"])
 def delete_personnel(personnel_id):
     try:
-        conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+        conn = get_db()
         cur = conn.cursor()
 
+        stats.personnel_removing(cur, personnel_id)
         cur.execute("DELETE FROM personnel WHERE id = %s", (personnel_id,))
         if cur.rowcount == 0:
             cur.close()
-            conn.close()
             return jsonify({"success": False, "error": "Personnel non trouvé"}), 404
 
+        bump_versions(cur, "personnel", "personnel_section")
         conn.commit()
+        invalidate("personnel", "section", "stats")
         cur.close()
-        conn.close()
         return jsonify({"success": True, "message": "Personnel supprimé avec succès"}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -1,28 +1,142 @@
 from flask import Blueprint, request, jsonify
-import pymysql
-from config import db_config
+from config import PAGINATION
+from utils.cache import cached_listing, invalidate
+from utils.columnar import columns_of, columns_response, wants_columns
+from utils.db import PoolTimeout, get_db, iter_query
+from utils.metrics import InstrumentedTupleCursor
+from utils.export import export_response, merge_last_column
+from utils.filters import section_filters
+from utils import stats
+from utils.links import LinkError, parse_ids, sync_links
+from utils.pagination import parse_limit, decode_cursor, paginate
+from utils.scope import scope_user
+from utils.versions import bump_versions, conditional_get
 from utils.auth import token_required, roles_required
 section_bp = Blueprint("section", __name__, url_prefix="/section")
 
-# ✅ Get all sections (with personnel)
+
+def _section_page_query(args, scope_user=None):
+    """(sql, params, limit) for one page of /section/all. Raises ValueError on bad input."""
+    limit = parse_limit(args)
+    before = decode_cursor(args.get("cursor"), int)
+    where, params = section_filters(args, scope_user)
+    if before is not None:
+        where.append("s.id < %s")
+        params.append(before)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    sql = f"""
+        SELECT s.id, s.code_section, s.label, s.type, s.unit
+        FROM section s
+        {where_sql}
+        ORDER BY s.id DESC
+        LIMIT %s
+    """
+    return sql, (*params, limit + 1), limit
+
+
+def _preview_query(section_ids, size):
+    """(sql, params): first `size` personnel names (alphabetical) + total count per section."""
+    placeholders = ", ".join(["%s"] * len(section_ids))
+    sql = f"""
+        SELECT section_id, nom, total
+        FROM (
+            SELECT ps.section_id, p.nom,
+                   ROW_NUMBER() OVER (PARTITION BY ps.section_id ORDER BY p.nom) AS rn,
+                   COUNT(*) OVER (PARTITION BY ps.section_id) AS total
+            FROM personnel_section ps
+            JOIN personnel p ON p.id = ps.personnel_id
+            WHERE ps.section_id IN ({placeholders})
+        ) t
+        WHERE rn <= %s
+        ORDER BY section_id, rn
+    """
+    return sql, (*section_ids, size)
+
+
+def _preview_map(preview_rows):
+    """{section_id: (names, total)} from the rows of _preview_query()."""
+    preview = {}
+    for row in preview_rows:
+        names, _ = preview.setdefault(row["section_id"], ([], row["total"]))
+        names.append(row["nom"])
+    return preview
+
+
+def _attach_preview(rows, preview_rows):
+    """Add `personnels` (names) and `personnel_count` to each section row."""
+    preview = _preview_map(preview_rows)
+    for row in rows:
+        names, total = preview.get(row["id"], ([], 0))
+        row["personnels"] = names
+        row["personnel_count"] = total
+    return rows
+
+
+# ✅ Get all sections (keyset pagination on id, newest first, with a personnel preview; ?format=columns)
 @section_bp.route("/all", methods=["GET"])
 @token_required
+@conditional_get("personnel", "personnel_section", "section")
+@cached_listing("section")
 def get_sections():
-    conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT s.id, s.code_section, s.label, s.type, s.unit,
-               GROUP_CONCAT(p.nom SEPARATOR ', ') AS personnels
-        FROM section s
-        LEFT JOIN personnel_section ps ON s.id = ps.section_id
-        LEFT JOIN personnel p ON ps.personnel_id = p.id
-        GROUP BY s.id
-        ORDER BY s.id DESC
-    """)
-    rows = cur.fetchall()
+    try:
+        sql, params, limit = _section_page_query(request.args, scope_user())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    conn = get_db()
+    columnar = wants_columns()
+    cur = conn.cursor(InstrumentedTupleCursor) if columnar else conn.cursor()
+    cur.execute(sql, params)
+    if columnar:
+        columns = columns_of(cur)
+        id_index = columns.index("id")
+        rows, next_cursor = paginate(cur.fetchall(), limit, id_index)
+        section_ids = [r[id_index] for r in rows]
+    else:
+        rows, next_cursor = paginate(cur.fetchall(), limit, "id")
+        section_ids = [r["id"] for r in rows]
     cur.close()
-    conn.close()
-    return jsonify({"success": True, "data": rows}), 200, {"Cache-Control": "no-store"}
+
+    preview_rows = []
+    if rows:
+        cur = conn.cursor()
+        cur.execute(*_preview_query(section_ids, PAGINATION["preview_size"]))
+        preview_rows = cur.fetchall()
+        cur.close()
+
+    if columnar:
+        preview = _preview_map(preview_rows)
+        rows = [[*r, *preview.get(r[id_index], ([], 0))] for r in rows]
+        return columns_response(columns + ["personnels", "personnel_count"], rows, next_cursor=next_cursor), 200
+    _attach_preview(rows, preview_rows)
+    return jsonify({"success": True, "data": rows, "next_cursor": next_cursor}), 200
+
+
+# ✅ Export sections (CSV or XLSX, streamed from an unbuffered cursor)
+@section_bp.route("/export", methods=["GET"])
+@token_required
+def export_sections():
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in ("csv", "xlsx"):
+        return jsonify({"success": False, "error": "format must be csv or xlsx"}), 400
+    where, params = section_filters(request.args, scope_user())
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+
+    try:
+        rows = iter_query(f"""
+            SELECT s.id, s.code_section, s.label, s.type, s.unit, p.nom
+            FROM section s
+            LEFT JOIN personnel_section ps ON s.id = ps.section_id
+            LEFT JOIN personnel p ON ps.personnel_id = p.id
+            {where_sql}
+            ORDER BY s.id ASC, p.nom ASC
+        """, params)
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+    columns = ["id", "code_section", "label", "type", "unit", "personnels"]
+    return export_response(columns, merge_last_column(rows), fmt, "sections")
 
 
 # ✅ Add section (with optional personnel links)
@@ -40,7 +154,12 @@ def add_section():
     if not code_section or not label or not unit or not type:
         return jsonify({"error": "Code Section, Label, Unit, and Type are required"}), 400
 
-    conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+    try:
+        personnel_ids = parse_ids(personnel_ids, "Personnel")
+    except LinkError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db()
     cur = conn.cursor()
     cur.execute(
         "INSERT INTO section (code_section, label, unit, type) VALUES (%s, %s, %s, %s)",
@@ -48,16 +167,18 @@ def add_section():
     )
     new_id = cur.lastrowid
 
-    # Insert links into personnel_section
-    for pid in personnel_ids:
-        cur.execute(
-            "INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)",
-            (pid, new_id)
-        )
+    # Insert links into personnel_section (validated with a single query)
+    if personnel_ids:
+        try:
+            sync_links(cur, "section_id", new_id, personnel_ids)
+        except LinkError as e:
+            cur.close()
+            return jsonify({"error": str(e)}), 400
 
+    bump_versions(cur, "section", "personnel_section")
     conn.commit()
+    invalidate("section", "personnel", "stats")
     cur.close()
-    conn.close()
 
     return jsonify({"success": True, "id": new_id}), 201
 
@@ -77,7 +198,12 @@ def update_section(section_id):
     if not code_section or not label or not unit or not type:
         return jsonify({"error": "Code Section, Label, Unit, and Type are required"}), 400
 
-    conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+    try:
+        personnel_ids = parse_ids(personnel_ids, "Personnel")
+    except LinkError as e:
+        return jsonify({"error": str(e)}), 400
+
+    conn = get_db()
     cur = conn.cursor()
 
     cur.execute(
@@ -87,20 +213,19 @@ def update_section(section_id):
 
     if cur.rowcount == 0:
         cur.close()
-        conn.close()
         return jsonify({"error": "Section not found"}), 404
 
-    # Reset links
-    cur.execute("DELETE FROM personnel_section WHERE section_id=%s", (section_id,))
-    for pid in personnel_ids:
-        cur.execute(
-            "INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)",
-            (pid, section_id)
-        )
+    # Apply only the difference with the current links
+    try:
+        sync_links(cur, "section_id", section_id, personnel_ids)
+    except LinkError as e:
+        cur.close()
+        return jsonify({"error": str(e)}), 400
 
+    bump_versions(cur, "section", "personnel_section")
     conn.commit()
+    invalidate("section", "personnel", "stats")
     cur.close()
-    conn.close()
 
     return jsonify({"success": True, "message": "Section updated successfully"}), 200
 
@@ -110,14 +235,15 @@ def update_section(section_id):
 @token_required
 @roles_required(["admin"])
 def delete_section(section_id):
-    conn = pymysql.connect(**db_config, cursorclass=pymysql.cursors.DictCursor)
+    conn = get_db()
     cur = conn.cursor()
+    stats.section_removing(cur, section_id)
     cur.execute("DELETE FROM section WHERE id=%s", (section_id,))
     if cur.rowcount == 0:
         cur.close()
-        conn.close()
         return jsonify({"error": "Section not found"}), 404
+    bump_versions(cur, "section", "personnel_section")
     conn.commit()
+    invalidate("section", "personnel", "stats")
     cur.close()
-    conn.close()
     return jsonify({"success": True, "message": "Section deleted successfully"}), 200
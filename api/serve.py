@@ -0,0 +1,27 @@
+"""
+Production launcher: pre-forked gunicorn workers with a thread pool each.
+
+    SECRET_KEY=... python api/serve.py
+
+Settings come from config.SERVER (API_WORKERS, API_THREADS, API_BIND, ...).
+SIGTERM or Ctrl+C stops accepting connections and lets running requests
+finish for up to API_GRACEFUL_TIMEOUT seconds; SIGHUP reloads the workers.
+Gunicorn needs a POSIX system (Linux, macOS, WSL).
+"""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from gunicorn.app.wsgiapp import WSGIApplication  # noqa: E402
+
+
+def main():
+    os.chdir(HERE)
+    sys.argv = [sys.argv[0], "-c", os.path.join(HERE, "gunicorn.conf.py"), *sys.argv[1:], "main:app"]
+    WSGIApplication("%(prog)s [OPTIONS]").run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+from flask import Blueprint, request, jsonify
+from utils import stats
+from utils.auth import token_required, roles_required
+from utils.cache import cached_listing, invalidate
+from utils.db import PoolTimeout, get_db
+from utils.filters import section_filters
+from utils.pagination import list_response, parse_limit, decode_cursor
+from utils.scope import personnel_condition, scope_user
+from utils.versions import bump_versions, conditional_get
+stats_bp = Blueprint("stats", __name__, url_prefix="/stats")
+
+# Every read below uses the counters of utils/stats.py: O(sections) rows at most,
+# never a scan of personnel_section. Users restricted by user_section (utils/scope.py)
+# only count their own sections and the personnel linked to them.
+
+
+def _group_sections(cur, column, scope):
+    where, params = section_filters({}, scope)
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    cur.execute(f"""
+        SELECT s.{column}, COUNT(*) AS sections,
+               CAST(SUM(s.headcount) AS SIGNED) AS headcount,
+               CAST(SUM(s.headcount = 0) AS SIGNED) AS empty_sections
+        FROM section s
+        {where_sql}
+        GROUP BY s.{column}
+        ORDER BY headcount DESC, s.{column} ASC
+    """, params)
+    return cur.fetchall()
+
+
+def _group_affectations(cur, scope):
+    if scope is None:
+        cur.execute("""
+            SELECT affectation, headcount, unassigned
+            FROM affectation_stats
+            WHERE headcount > 0
+            ORDER BY headcount DESC, affectation ASC
+        """)
+        return cur.fetchall()
+    # The counters are global: count the personnel of the user's sections instead
+    # (all of them have a section, so none is unassigned)
+    condition, params = personnel_condition("p.id", scope)
+    cur.execute(f"""
+        SELECT p.affectation, COUNT(*) AS headcount, 0 AS unassigned
+        FROM personnel p
+        WHERE {condition}
+        GROUP BY p.affectation
+        ORDER BY headcount DESC, p.affectation ASC
+    """, params)
+    return cur.fetchall()
+
+
+# ✅ Dashboard totals + headcount per section type, unit and affectation
+@stats_bp.route("", methods=["GET"])
+@token_required
+@conditional_get("personnel", "personnel_section", "section")
+@cached_listing("stats")
+def get_stats():
+    try:
+        scope = scope_user()
+        cur = get_db().cursor()
+        by_type = _group_sections(cur, "type", scope)
+        by_unit = _group_sections(cur, "unit", scope)
+        by_affectation = _group_affectations(cur, scope)
+        cur.close()
+        totals = {
+            "personnel": sum(r["headcount"] for r in by_affectation),
+            "sections": sum(r["sections"] for r in by_type),
+            "links": sum(r["headcount"] for r in by_type),
+            "personnel_without_section": sum(r["unassigned"] for r in by_affectation),
+            "sections_without_personnel": sum(r["empty_sections"] for r in by_type),
+        }
+        return jsonify({"success": True, "data": {
+            "totals": totals, "by_type": by_type, "by_unit": by_unit, "by_affectation": by_affectation,
+        }}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+def _headcount_page_query(args, scope_user=None):
+    """(sql, params, limit) for /stats/sections, largest first. Raises ValueError on bad input."""
+    limit = parse_limit(args)
+    after = decode_cursor(args.get("cursor"), (int, int))
+    where, params = section_filters(args, scope_user)
+    if args.get("empty") in ("1", "true"):
+        where.append("s.headcount = 0")
+    if after is not None:
+        headcount, last_id = after
+        where.append("(s.headcount < %s OR (s.headcount = %s AND s.id < %s))")
+        params.extend((headcount, headcount, last_id))
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    sql = f"""
+        SELECT s.id, s.code_section, s.label, s.type, s.unit, s.headcount
+        FROM section s
+        {where_sql}
+        ORDER BY s.headcount DESC, s.id DESC
+        LIMIT %s
+    """
+    return sql, (*params, limit + 1), limit
+
+
+# ✅ Headcount per section (?type=, ?unit=, ?empty=1 for sections without personnel)
+@stats_bp.route("/sections", methods=["GET"])
+@token_required
+@conditional_get("personnel", "personnel_section", "section")
+@cached_listing("stats")
+def get_section_headcounts():
+    try:
+        sql, params, limit = _headcount_page_query(request.args, scope_user())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    try:
+        return list_response(sql, params, limit, ("headcount", "id"))
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+def _unassigned_page_query(args, scope_user=None):
+    """(sql, params, limit) for /stats/unassigned, by matricule. Raises ValueError on bad input."""
+    limit = parse_limit(args)
+    after = decode_cursor(args.get("cursor"), str)
+    where, params = ["p.section_count = 0"], []
+    if scope_user is not None:
+        # Empty for a scoped user: personnel without section are in nobody's sections
+        condition, condition_params = personnel_condition("p.id", scope_user)
+        where.append(condition)
+        params.extend(condition_params)
+    if args.get("affectation"):
+        where.append("p.affectation = %s")
+        params.append(args["affectation"])
+    if after is not None:
+        where.append("p.matricule > %s")
+        params.append(after)
+    sql = f"""
+        SELECT p.id, p.matricule, p.nom, p.qualification, p.affectation
+        FROM personnel p
+        WHERE {" AND ".join(where)}
+        ORDER BY p.matricule ASC
+        LIMIT %s
+    """
+    return sql, (*params, limit + 1), limit
+
+
+# ✅ Personnel without any section (?affectation=)
+@stats_bp.route("/unassigned", methods=["GET"])
+@token_required
+@conditional_get("personnel", "personnel_section", "section")
+@cached_listing("stats")
+def get_unassigned():
+    try:
+        sql, params, limit = _unassigned_page_query(request.args, scope_user())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    try:
+        return list_response(sql, params, limit, ("matricule",))
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ✅ Recompute the counters (after loading data outside the API)
+@stats_bp.route("/rebuild", methods=["POST"])
+@token_required
+@roles_required(["admin"])
+def rebuild_stats():
+    try:
+        conn = get_db()
+        cur = conn.cursor()
+        stats.rebuild(cur)
+        bump_versions(cur, "personnel", "section", "users")
+        conn.commit()
+        invalidate("stats")
+        cur.close()
+        return jsonify({"success": True, "message": "Statistics rebuilt"}), 200
+    except PoolTimeout:
+        raise   # answered 503 by the errorhandler in utils/db.py
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
@@ -1,40 +1,183 @@
 import jwt
 import datetime
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 from flask import request, jsonify
-from config import SECRET_KEY
+from config import SECRET_KEY, TOKEN_CACHE, USER_CACHE
+from utils.cache import TTLCache
+from utils.db import get_db
 
 # ✅ Generate JWT token including user_id
-def generate_token(user_id, email, role):
+def generate_token(user_id, email, role, version=0):
     payload = {
         "id": user_id,   # 👈 add user_id from DB
         "email": email,
         "role": role,
+        "ver": version,  # users.token_version at login; bumped to revoke the token
         "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=2)
     }
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
+# 🔹 Verified-token cache: a page load sends several requests with the same token,
+# so the HMAC verification is done once per token until it expires.
+_token_cache = OrderedDict()   # sha256(token) -> (exp, payload), least recently used first
+_token_expiry = []             # heap of (exp, key): hits reorder _token_cache, not the expiry order
+_token_lock = threading.Lock()
+_token_stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+
+def _decode_token(token):
+    """jwt.decode() with a bounded cache of verified payloads (raises like jwt.decode)."""
+    if not TOKEN_CACHE["enabled"]:
+        return jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    with _token_lock:
+        entry = _token_cache.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                _token_cache.move_to_end(key)
+                _token_stats["hits"] += 1
+                return dict(entry[1])
+            del _token_cache[key]
+            _token_stats["expired"] += 1
+        _token_stats["misses"] += 1
+
+    decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    exp = decoded.get("exp")
+    if exp is None:
+        return decoded   # never cache a token without expiry
+
+    with _token_lock:
+        _token_cache[key] = (exp, dict(decoded))
+        heapq.heappush(_token_expiry, (exp, key))
+        while _token_expiry and _token_expiry[0][0] <= now:
+            old_exp, old_key = heapq.heappop(_token_expiry)
+            entry = _token_cache.get(old_key)
+            if entry is not None and entry[0] == old_exp:
+                del _token_cache[old_key]
+                _token_stats["expired"] += 1
+        while len(_token_cache) > TOKEN_CACHE["max_entries"]:
+            _token_cache.popitem(last=False)
+            _token_stats["evicted"] += 1
+        if len(_token_expiry) > 2 * TOKEN_CACHE["max_entries"]:
+            # Drop the heap items of evicted entries
+            _token_expiry[:] = [(entry_exp, k) for k, (entry_exp, _) in _token_cache.items()]
+            heapq.heapify(_token_expiry)
+    return decoded
+
+
+def token_cache_stats():
+    with _token_lock:
+        lookups = _token_stats["hits"] + _token_stats["misses"]
+        return {
+            "enabled": TOKEN_CACHE["enabled"],
+            "entries": len(_token_cache),
+            "max_entries": TOKEN_CACHE["max_entries"],
+            **_token_stats,
+            "hit_rate": round(_token_stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def verify_auth_header(auth_header):
+    """(payload, None) for a valid "Bearer <jwt>" header, else (None, error message)."""
+    if not auth_header:
+        return None, "Token is missing"
+
+    parts = auth_header.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None, "Invalid token format"
+
+    try:
+        return _decode_token(parts[1]), None
+    except jwt.ExpiredSignatureError:
+        return None, "Token expired"
+    except jwt.InvalidTokenError:
+        return None, "Invalid token"
+
+
+# 🔹 Current role(s), status and token version of each user. The JWT only proves who
+# the caller is; what they may do is read from users / user_roles / roles, at most
+# once per USER_CACHE["ttl"] seconds per user and worker (update_user / delete_user
+# drop the entry at once in their own worker).
+_user_cache = TTLCache(USER_CACHE["max_entries"], USER_CACHE["ttl"])
+
+
+def user_query(user_id):
+    """(sql, params) of the row _user_entry() expects."""
+    return """
+        SELECT u.role, u.status, u.token_version,
+               GROUP_CONCAT(r.role_name) AS extra_roles
+        FROM users u
+        LEFT JOIN user_roles ur ON ur.user_id = u.id
+        LEFT JOIN roles r ON r.id = ur.role_id
+        WHERE u.id = %s
+        GROUP BY u.id
+    """, (user_id,)
+
+
+def _user_entry(row):
+    if row is None:
+        return False   # cached as well: a deleted user is refused without a query
+    roles = ({row["role"]} | set((row["extra_roles"] or "").split(","))) - {None, ""}
+    return {"role": row["role"], "roles": sorted(roles), "status": row["status"],
+            "version": row["token_version"]}
+
+
+def cached_user(user_id):
+    """Cached entry of `user_id` (False if the user does not exist), None on a miss."""
+    return _user_cache.get(user_id) if USER_CACHE["enabled"] else None
+
+
+def store_user(user_id, row):
+    entry = _user_entry(row)
+    if USER_CACHE["enabled"]:
+        _user_cache.set(user_id, entry, USER_CACHE["ttl"])
+    return entry
+
+
+def invalidate_user(user_id):
+    _user_cache.pop(user_id)
+
+
+def user_cache_stats():
+    return {"enabled": USER_CACHE["enabled"], **_user_cache.stats()}
+
+
+def authorize(decoded, entry):
+    """(request.user, None) if the token still matches the user's entry, else (None, error)."""
+    if not entry or decoded.get("ver", 0) != entry["version"]:
+        return None, "Token revoked"
+    if entry["status"] not in (None, "active"):
+        return None, "Account disabled"
+    return {**decoded, "role": entry["role"], "roles": entry["roles"]}, None
+
+
+def _load_user(user_id):
+    entry = cached_user(user_id)
+    if entry is None:
+        cur = get_db().cursor()
+        cur.execute(*user_query(user_id))
+        entry = store_user(user_id, cur.fetchone())
+        cur.close()
+    return entry
+
+
 # Middleware: verify JWT
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Token is missing"}), 401
-
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != "bearer":
-            return jsonify({"error": "Invalid token format"}), 401
-
-        token = parts[1]
-        try:
-            decoded = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            request.user = decoded  # 👈 now contains id, email, role
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
-
+        decoded, error = verify_auth_header(request.headers.get("Authorization"))
+        if not error:
+            decoded, error = authorize(decoded, _load_user(decoded.get("id")))
+        if error:
+            return jsonify({"error": error}), 401
+        request.user = decoded  # 👈 id, email, plus role / roles as currently stored in the DB
         return f(*args, **kwargs)
     return decorated
 
@@ -42,7 +185,8 @@ def token_required(f):
 # Role-based authorization decorator
 def roles_required(allowed_roles):
     """
-    Ensure the authenticated user has one of the allowed roles.
+    Ensure the authenticated user has one of the allowed roles: `users.role` or a
+    role granted in `user_roles`, as resolved by token_required (not the JWT claim).
 
     Usage:
         @app.route('/admin')
@@ -55,9 +199,9 @@ def roles_required(allowed_roles):
         @wraps(f)
         def decorated(*args, **kwargs):
             user = getattr(request, 'user', None)
-            if not user or 'role' not in user:
+            if not user or 'roles' not in user:
                 return jsonify({"error": "Unauthorized"}), 401
-            if user['role'] not in allowed_roles:
+            if not any(role in allowed_roles for role in user['roles']):
                 return jsonify({"error": "Forbidden: insufficient role"}), 403
             return f(*args, **kwargs)
         return decorated
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, g, make_response, request
+from config import CACHE_CONFIG
+from utils.columnar import variant_args
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_entries=256, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate(self, *namespaces):
+        """Drop every entry whose key starts with one of `namespaces` (all entries if none given)."""
+        with self._lock:
+            if namespaces:
+                stale = [k for k in self._data if k[0] in namespaces]
+            else:
+                stale = list(self._data)
+            for k in stale:
+                del self._data[k]
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+listing_cache = TTLCache(CACHE_CONFIG["max_entries"], CACHE_CONFIG["ttl"])
+
+
+def cached_listing(namespace):
+    """
+    Cache a GET handler's serialized response, keyed by endpoint + query string
+    (+ the format negotiated from Accept).
+    Only 200 responses are stored; mutating handlers call invalidate(namespace).
+    """
+    from utils.scope import request_scope, scope_key   # utils.scope imports TTLCache from here
+
+    def wrapper(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not CACHE_CONFIG["enabled"]:
+                return f(*args, **kwargs)
+            # Table versions (set by @conditional_get) make entries written by a stale
+            # worker unreachable as soon as another worker commits a change; the scope
+            # key keeps the listings of users restricted by user_section apart, so it
+            # is computed here even when @conditional_get fell back to a plain GET.
+            key = (namespace, request.path, tuple(sorted(variant_args())),
+                   tuple(sorted(g.get("table_versions", {}).items())), scope_key(request_scope()[1]))
+            hit = listing_cache.get(key)
+            if hit is not None:
+                body, mimetype, headers = hit
+                return Response(body, 200, {**headers, "X-Cache": "HIT"}, mimetype=mimetype)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                headers = {k: v for k, v in response.headers.items()
+                           if k.lower() not in ("content-length", "content-type")}
+                listing_cache.set(key, (response.get_data(), response.mimetype, headers))
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return decorated
+    return wrapper
+
+
+def invalidate(*namespaces):
+    listing_cache.invalidate(*namespaces)
+
+
+def cache_stats():
+    return {"enabled": CACHE_CONFIG["enabled"], **listing_cache.stats()}
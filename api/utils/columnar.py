@@ -0,0 +1,35 @@
+from flask import jsonify, request
+
+# Opt-in compact format of the list endpoints: column names once, then one
+# array per row, read from a tuple cursor instead of one dict per row.
+#   GET /personnel/all?format=columns
+#   GET /personnel/all   with  Accept: application/vnd.columns+json
+# -> {"success": true, "columns": [...], "rows": [[...], ...], "next_cursor": ...}
+
+COLUMNS_MEDIA_TYPE = "application/vnd.columns+json"
+
+
+def wants_columns():
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt == "columns"
+    return request.accept_mimetypes.best_match(["application/json", COLUMNS_MEDIA_TYPE]) == COLUMNS_MEDIA_TYPE
+
+
+def variant_args():
+    """Query items identifying the representation (used by the listing cache and ETags)."""
+    items = list(request.args.items(multi=True))
+    if "format" not in request.args and wants_columns():
+        items.append(("format", "columns"))   # selected by Accept: must not share the JSON variant's key
+    return items
+
+
+def columns_of(cursor):
+    return [d[0] for d in cursor.description]
+
+
+def columns_response(columns, rows, **extra):
+    """jsonify() of the compact format; `rows` are sequences in `columns` order."""
+    response = jsonify({"success": True, "columns": columns, "rows": rows, **extra})
+    response.headers.add("Vary", "Accept")
+    return response
@@ -0,0 +1,55 @@
+import gzip
+from flask import request
+from config import COMPRESSION
+
+try:
+    import brotli   # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Response compression negotiated from Accept-Encoding (br > gzip), applied
+# to buffered JSON / text bodies above a minimum size.
+
+COMPRESSIBLE = ("application/json", "application/vnd.columns+json", "text/csv", "text/plain", "text/html")
+
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESSION["brotli_quality"])
+    return gzip.compress(data, compresslevel=COMPRESSION["gzip_level"])
+
+
+def _compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION["min_size"]:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The compressed bytes differ from the identity ones: the validator becomes weak
+    # (conditional_get compares If-None-Match weakly, so 304s keep working)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    if COMPRESSION["enabled"]:
+        app.after_request(_compress_response)
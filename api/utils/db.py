@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+import pymysql
+from flask import g, has_app_context, jsonify
+from config import db_config, POOL_CONFIG, EXPORT
+from utils.metrics import InstrumentedCursor, InstrumentedSSCursor
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of PyMySQL connections.
+
+    - at most `max_size` connections are open at the same time
+    - `acquire()` waits up to `checkout_timeout` seconds, then raises PoolTimeout
+    - connections idle for more than `ping_after` seconds are pinged before reuse
+    - connections older than `max_age` seconds are closed and replaced
+    """
+
+    def __init__(self, config, max_size=10, checkout_timeout=5, max_age=1800, ping_after=5):
+        self.config = config
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_age = max_age
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        self._idle = []      # [(conn, created_at, last_used)] - LIFO keeps hot connections warm
+        self._born = {}      # id(conn) -> created_at, for connections currently checked out
+        self._size = 0       # idle + in use
+        self._waiting = 0
+
+        # statistics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._ping_failures = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self):
+        conn = pymysql.connect(**self.config, cursorclass=InstrumentedCursor)
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _expired(self, created_at, now):
+        return self.max_age and now - created_at > self.max_age
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.checkout_timeout
+        entry = None
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1   # reserve a slot, connect outside the lock
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"No database connection available after {self.checkout_timeout}s"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+        try:
+            conn, created_at = self._prepare(entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._born[id(conn)] = created_at
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def _prepare(self, entry):
+        """Return a usable (conn, created_at) from an idle entry, or a new connection."""
+        now = time.monotonic()
+        if entry is not None:
+            conn, created_at, last_used = entry
+            if self._expired(created_at, now):
+                self._close_quietly(conn)
+                with self._cond:
+                    self._recycled += 1
+            elif now - last_used < self.ping_after:
+                return conn, created_at
+            else:
+                try:
+                    conn.ping(reconnect=False)
+                    return conn, created_at
+                except Exception:
+                    self._close_quietly(conn)
+                    with self._cond:
+                        self._ping_failures += 1
+        return self._connect(), time.monotonic()
+
+    def release(self, conn, discard=False):
+        if not discard:
+            try:
+                conn.rollback()   # drop any uncommitted work / stale read snapshot
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        with self._cond:
+            created_at = self._born.pop(id(conn), now)
+            if discard or self._expired(created_at, now):
+                self._size -= 1
+                if not discard:
+                    self._recycled += 1
+            else:
+                self._idle.append((conn, created_at, now))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    def warm(self, count):
+        """Open up to `count` idle connections ahead of the first request; returns how many."""
+        opened = 0
+        while opened < count:
+            with self._cond:
+                if self._size >= self.max_size or len(self._idle) >= count:
+                    break
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic(), time.monotonic()))
+                self._cond.notify()
+            opened += 1
+        return opened
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            in_use = self._size - len(self._idle)
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "ping_failures": self._ping_failures,
+                "wait_avg_ms": round(self._wait_total / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide pool, re-created after a fork (sockets cannot be shared)."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(
+                    db_config,
+                    max_size=POOL_CONFIG["max_size"],
+                    checkout_timeout=POOL_CONFIG["checkout_timeout"],
+                    max_age=POOL_CONFIG["max_age"],
+                    ping_after=POOL_CONFIG["ping_after"],
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def warm_pool(count=None):
+    """Pre-open connections in this process (called by the launcher once per worker)."""
+    if not POOL_CONFIG["enabled"]:
+        return 0
+    return get_pool().warm(POOL_CONFIG["warm_size"] if count is None else count)
+
+
+def close_pool():
+    """Close the idle connections of this process (worker shutdown)."""
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.close_all()
+
+
+def get_db():
+    """
+    Connection for the current request (checked out once per app context).
+    It goes back to the pool in teardown, so handlers must not close it.
+    """
+    if "db" not in g:
+        if POOL_CONFIG["enabled"]:
+            g.db = get_pool().acquire()
+        else:
+            g.db = pymysql.connect(**db_config, cursorclass=InstrumentedCursor)
+    return g.db
+
+
+def release_db():
+    """Give the request's connection back early (e.g. before slow CPU work)."""
+    conn = g.pop("db", None)
+    if conn is None:
+        return
+    if POOL_CONFIG["enabled"]:
+        get_pool().release(conn)
+    else:
+        ConnectionPool._close_quietly(conn)
+
+
+def discard_db():
+    """Close the request's connection instead of returning it (e.g. an unfinished unbuffered read)."""
+    conn = g.pop("db", None)
+    if conn is None:
+        return
+    if POOL_CONFIG["enabled"]:
+        get_pool().release(conn, discard=True)
+    else:
+        ConnectionPool._close_quietly(conn)
+
+
+def iter_query(sql, params=(), arraysize=1000):
+    """
+    Iterator over the result tuples of an unbuffered (server-side) cursor, so memory
+    stays constant whatever the table size. The checkout, the query and the first
+    fetch run before this returns: PoolTimeout and SQL errors reach the view, not
+    the streamed body. If the consumer stops early, the connection is dropped
+    rather than draining the remaining rows.
+    """
+    rows = _iter_query(sql, params, arraysize)
+    next(rows)   # primed: runs up to the first fetch
+    return rows
+
+
+def _iter_query(sql, params, arraysize):
+    conn = get_db()
+    cur = conn.cursor(InstrumentedSSCursor)
+    done = False
+    try:
+        # The server aborts slow readers after net_write_timeout; a download can be slow.
+        # Until it is restored, teardown closes the connection instead of pooling it.
+        cur.execute("SELECT @@SESSION.net_write_timeout")
+        ((previous,),) = cur.fetchall()
+        g.db_discard = True
+        cur.execute("SET SESSION net_write_timeout = %s", (EXPORT["net_write_timeout"],))
+        cur.execute(sql, params)
+        rows = cur.fetchmany(arraysize)
+        yield None
+        while rows:
+            yield from rows
+            rows = cur.fetchmany(arraysize)
+        cur.execute("SET SESSION net_write_timeout = %s", (previous,))
+        g.pop("db_discard", None)
+        done = True
+    finally:
+        if done:
+            cur.close()
+        elif has_app_context() and g.get("db") is conn:
+            discard_db()
+        # else the request ended first; its teardown closed the connection (db_discard)
+
+
+def pool_stats():
+    if not POOL_CONFIG["enabled"]:
+        return {"enabled": False}
+    return {"enabled": True, **get_pool().stats()}
+
+
+def _teardown_db(exc):
+    if g.pop("db_discard", False):
+        discard_db()
+    else:
+        release_db()
+
+
+def init_app(app):
+    app.teardown_appcontext(_teardown_db)
+
+    @app.errorhandler(PoolTimeout)
+    def _pool_timeout(e):
+        return jsonify({"success": False, "error": str(e)}), 503
@@ -0,0 +1,19 @@
+# WHERE-clause builders shared by the listings of several blueprints
+from utils.scope import section_condition
+
+
+def section_filters(args, scope_user=None):
+    """WHERE clauses + params for the ?type= and ?unit= filters (and the sections of
+    `scope_user`, see utils/scope.py)."""
+    where, params = [], []
+    if scope_user is not None:
+        condition, condition_params = section_condition("s.id", scope_user)
+        where.append(condition)
+        params.extend(condition_params)
+    if args.get("type"):
+        where.append("s.type = %s")
+        params.append(args["type"])
+    if args.get("unit"):
+        where.append("s.unit = %s")
+        params.append(args["unit"])
+    return where, params
@@ -0,0 +1,67 @@
+# Set-based maintenance of the personnel_section join table
+from utils import stats
+
+_SIDES = {
+    # owner column -> (other column, table the other column points to, label for errors)
+    "personnel_id": ("section_id", "section", "Section"),
+    "section_id": ("personnel_id", "personnel", "Personnel"),
+}
+
+
+class LinkError(ValueError):
+    """A requested link points to a row that does not exist."""
+
+
+def parse_ids(values, label, keep_order=False):
+    """[1, "2", None, ""] -> [1, 2] (sorted, or deduplicated in input order); raises LinkError on anything non-numeric."""
+    try:
+        ids = [int(v) for v in (values or []) if v not in (None, "")]
+    except (ValueError, TypeError):
+        raise LinkError(f"Invalid {label.lower()} ID format")
+    return list(dict.fromkeys(ids)) if keep_order else sorted(set(ids))
+
+
+def sync_links(cur, owner_column, owner_id, target_ids):
+    """
+    Make the links of one personnel (owner_column="personnel_id") or one section
+    (owner_column="section_id") exactly `target_ids`, with at most three statements:
+    one query validating the targets and reading which are already linked, one
+    multi-row INSERT for the new links and one DELETE for the dropped ones.
+    Unchanged links are not touched. Returns (added_ids, removed_count).
+    """
+    other_column, other_table, label = _SIDES[owner_column]
+    target_ids = sorted(set(target_ids))
+
+    to_add = []
+    if target_ids:
+        placeholders = ", ".join(["%s"] * len(target_ids))
+        cur.execute(f"""
+            SELECT t.id, ps.{other_column} IS NOT NULL AS linked
+            FROM {other_table} t
+            LEFT JOIN personnel_section ps
+                   ON ps.{other_column} = t.id AND ps.{owner_column} = %s
+            WHERE t.id IN ({placeholders})
+        """, (owner_id, *target_ids))
+        found = {row["id"]: row["linked"] for row in cur.fetchall()}
+        missing = [tid for tid in target_ids if tid not in found]
+        if missing:
+            raise LinkError(f"{label} with ID {missing[0]} not found")
+        to_add = [tid for tid in target_ids if not found[tid]]
+
+    if target_ids:
+        where = f"ps.{owner_column} = %s AND ps.{other_column} NOT IN ({placeholders})"
+        params = (owner_id, *target_ids)
+    else:
+        where, params = f"ps.{owner_column} = %s", (owner_id,)
+    stats.unlinking(cur, where, params)
+    cur.execute(f"DELETE ps FROM personnel_section ps WHERE {where}", params)
+    removed = cur.rowcount
+
+    if to_add:
+        values = ", ".join(["(%s, %s)"] * len(to_add))
+        pairs = [(owner_id, tid) if owner_column == "personnel_id" else (tid, owner_id) for tid in to_add]
+        cur.execute(f"INSERT INTO personnel_section (personnel_id, section_id) VALUES {values}",
+                    [v for pair in pairs for v in pair])
+        stats.linked(cur, pairs)
+
+    return to_add, removed
@@ -0,0 +1,183 @@
+import hmac
+import logging
+import threading
+import time
+import pymysql
+from flask import Response, g, has_app_context, jsonify, request
+from config import METRICS
+from utils import slowlog
+
+# Per-process request / SQL instrumentation, exposed in Prometheus text format
+# on GET /metrics and per response in a Server-Timing header.
+
+log = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for labels, series in items:
+            base = _labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+
+def _labels(names, values):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, escaped))
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time spent in the handler.",
+                            ("method", "route", "status"), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements executed per request.",
+                            ("method", "route"), QUERY_BUCKETS)
+DB_SECONDS = Counter("db_query_seconds_total", "Time spent in SQL statements.", ("method", "route"))
+DB_ROWS = Counter("db_rows_total", "Rows returned or affected by SQL statements.", ("method", "route"))
+RESPONSE_BYTES = Counter("http_response_bytes_total", "Response body bytes (streamed bodies excluded).",
+                         ("method", "route"))
+ALL_METRICS = (REQUEST_SECONDS, REQUEST_QUERIES, DB_SECONDS, DB_ROWS, RESPONSE_BYTES)
+
+
+class _InstrumentedMixin:
+    """Adds the time, count and rows of every statement to the current request's totals."""
+
+    def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            seconds = time.perf_counter() - start
+            _record_query(seconds, self.rowcount)
+            slowlog.observe(self, query, args, seconds)
+
+    def executemany(self, query, args):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, args)
+        finally:
+            seconds = time.perf_counter() - start
+            _record_query(seconds, self.rowcount)
+            slowlog.observe(self, query, None, seconds)
+
+
+class InstrumentedCursor(_InstrumentedMixin, pymysql.cursors.DictCursor):
+    """Default cursor class of every connection (see utils/db.py)."""
+
+
+class InstrumentedTupleCursor(_InstrumentedMixin, pymysql.cursors.Cursor):
+    """Rows as tuples, for the compact list format (see utils/columnar.py)."""
+
+
+class InstrumentedSSCursor(_InstrumentedMixin, pymysql.cursors.SSCursor):
+    """Unbuffered cursor; its row count is unknown until the result is drained."""
+
+
+def _record_query(seconds, rowcount):
+    # executemany() is counted once per call; it runs batched statements anyway
+    if not has_app_context() or "db_queries" not in g:
+        return
+    g.db_queries += 1
+    g.db_seconds += seconds
+    if rowcount is not None and 0 <= rowcount < 2 ** 63:
+        g.db_rows += rowcount
+
+
+def _start_request():
+    g.request_start = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+    g.db_rows = 0
+
+
+def _finish_request(response):
+    if "request_start" not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    labels = (request.method, route)
+
+    REQUEST_SECONDS.observe((*labels, response.status_code), elapsed)
+    REQUEST_QUERIES.observe(labels, g.db_queries)
+    DB_SECONDS.inc(labels, g.db_seconds)
+    DB_ROWS.inc(labels, g.db_rows)
+    if not response.is_streamed:
+        RESPONSE_BYTES.inc(labels, response.calculate_content_length() or 0)
+
+    if g.db_queries >= METRICS["query_warning_threshold"]:
+        log.warning("%s %s ran %d SQL statements (possible N+1)", request.method, route, g.db_queries)
+
+    response.headers["Server-Timing"] = (
+        f'app;dur={elapsed * 1000:.1f}, db;dur={g.db_seconds * 1000:.1f};desc="{g.db_queries} queries"'
+    )
+    return response
+
+
+def _metrics_view():
+    token = METRICS["token"]
+    if token:
+        sent = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(sent.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return jsonify({"error": "Unauthorized"}), 401
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    if not METRICS["enabled"]:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule("/metrics", "metrics", _metrics_view, methods=["GET"])
@@ -0,0 +1,90 @@
+import base64
+import json
+from flask import jsonify
+from config import PAGINATION
+from utils.columnar import columns_of, columns_response, wants_columns
+from utils.db import get_db
+from utils.metrics import InstrumentedTupleCursor
+
+
+def parse_limit(args):
+    """Page size from ?limit=, clamped to PAGINATION['max_limit']. Raises ValueError."""
+    raw = args.get("limit")
+    if raw in (None, ""):
+        return PAGINATION["default_limit"]
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise ValueError("limit must be a positive integer")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, PAGINATION["max_limit"])
+
+
+def encode_cursor(value):
+    """Opaque cursor for the last key of a page."""
+    raw = json.dumps(value, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+# JSON values accepted for each key type (bool is an int subclass, never a key)
+_CURSOR_TYPES = {str: (str,), int: (int,), float: (int, float)}
+
+
+def _cursor_value_ok(value, kind):
+    return not isinstance(value, bool) and isinstance(value, _CURSOR_TYPES[kind])
+
+
+def decode_cursor(token, shape):
+    """
+    Inverse of encode_cursor(); None when no cursor was sent. `shape` is the type of
+    the page key (str, int or float), or a tuple of types for a composite key, which
+    is returned as a tuple. Raises ValueError unless the cursor has that shape.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if isinstance(shape, tuple):
+        if (isinstance(value, list) and len(value) == len(shape)
+                and all(_cursor_value_ok(v, kind) for v, kind in zip(value, shape))):
+            return tuple(value)
+    elif _cursor_value_ok(value, shape):
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def paginate(rows, limit, key):
+    """
+    Split a `limit + 1` fetch into (page, next_cursor).
+    The extra row only tells us whether another page exists.
+    `key` is a column name, or a tuple of names for a composite cursor.
+    """
+    if len(rows) > limit:
+        page = rows[:limit]
+        last = page[-1]
+        value = [last[k] for k in key] if isinstance(key, tuple) else last[key]
+        return page, encode_cursor(value)
+    return rows, None
+
+
+def list_response(sql, params, limit, cursor_keys):
+    """Run a page query; objects by default, column names + row arrays when requested."""
+    conn = get_db()
+    if wants_columns():
+        cur = conn.cursor(InstrumentedTupleCursor)
+        cur.execute(sql, params)
+        columns = columns_of(cur)
+        key = tuple(columns.index(k) for k in cursor_keys)
+        rows, next_cursor = paginate(cur.fetchall(), limit, key if len(key) > 1 else key[0])
+        cur.close()
+        return columns_response(columns, rows, next_cursor=next_cursor), 200
+
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    rows, next_cursor = paginate(cur.fetchall(), limit, cursor_keys if len(cursor_keys) > 1 else cursor_keys[0])
+    cur.close()
+    return jsonify({"success": True, "data": rows, "next_cursor": next_cursor}), 200
@@ -0,0 +1,59 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from config import BCRYPT_ROUNDS, PASSWORD_POOL
+
+
+class PasswordPoolBusy(Exception):
+    """Too many hash/verify operations queued: shed load instead of stalling."""
+
+
+# bcrypt releases the GIL while hashing, so a small thread pool caps the CPU spent
+# on logins at PASSWORD_POOL["workers"] cores and leaves the rest for other endpoints.
+_executor = None
+_slots = None
+_pid = None
+_lock = threading.Lock()
+
+
+def _pool():
+    """(executor, slots) for this process; rebuilt after a fork."""
+    global _executor, _slots, _pid
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=PASSWORD_POOL["workers"],
+                                               thread_name_prefix="bcrypt")
+                _slots = threading.BoundedSemaphore(PASSWORD_POOL["workers"] + PASSWORD_POOL["max_queue"])
+                _pid = os.getpid()
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy("Server busy, please retry")
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=PASSWORD_POOL["timeout"])
+    except FutureTimeout:
+        raise PasswordPoolBusy("Server busy, please retry")
+
+
+def hash_password(password):
+    """bcrypt hash (str) with the configured cost factor."""
+    hashed = _run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+    return hashed.decode("utf-8")
+
+
+def check_password(password, stored_hash):
+    """Verify `password` against a bcrypt hash stored as str or bytes."""
+    if isinstance(stored_hash, str):
+        stored_hash = stored_hash.encode("utf-8")
+    return _run(bcrypt.checkpw, password.encode("utf-8"), stored_hash)
@@ -0,0 +1,88 @@
+# Row-level scoping by user_section ("responsabilité analytique"): users without
+# one of SCOPE["unrestricted_roles"] only see the sections they are responsible
+# for and the personnel linked to them. The restriction is a semi-join on
+# user_section (PK user_id, section_id) added to the listing SQL itself; the
+# user's section set is cached and only identifies the scope in ETags and cache keys.
+import hashlib
+from flask import g, request
+from config import SCOPE
+from utils.cache import TTLCache
+from utils.db import get_db
+
+_scope_cache = TTLCache(SCOPE["max_entries"], SCOPE["ttl"])
+
+
+def section_condition(column, user_id):
+    """(sql, params): `column` (a section id) is one of the user's sections."""
+    return f"{column} IN (SELECT us.section_id FROM user_section us WHERE us.user_id = %s)", [user_id]
+
+
+def personnel_condition(column, user_id):
+    """(sql, params): `column` (a personnel id) is linked to one of the user's sections."""
+    return f"""{column} IN (SELECT sp.personnel_id
+                            FROM user_section us
+                            JOIN personnel_section sp ON sp.section_id = us.section_id
+                            WHERE us.user_id = %s)""", [user_id]
+
+
+def link_condition(column, user_id):
+    """(sql, params) for a join on personnel_section: only the user's sections, TRUE when unrestricted."""
+    if user_id is None:
+        return "TRUE", []
+    return section_condition(column, user_id)
+
+
+def sections_query(user_id):
+    return "SELECT section_id FROM user_section WHERE user_id = %s ORDER BY section_id", (user_id,)
+
+
+def cached_sections(user_id):
+    """Cached section ids of `user_id`, None on a miss."""
+    return _scope_cache.get(user_id)
+
+
+def store_sections(user_id, rows):
+    sections = tuple(row["section_id"] for row in rows)
+    _scope_cache.set(user_id, sections, SCOPE["ttl"])
+    return sections
+
+
+def invalidate_scope(user_id):
+    _scope_cache.pop(user_id)
+
+
+def scope_cache_stats():
+    return _scope_cache.stats()
+
+
+def is_restricted(user):
+    return not any(role in SCOPE["unrestricted_roles"] for role in user.get("roles", [user.get("role")]))
+
+
+def scope_key(sections):
+    """Short identifier of a section set, for ETags and cache keys (None = unrestricted)."""
+    if sections is None:
+        return None
+    return hashlib.sha1(",".join(map(str, sections)).encode("ascii")).hexdigest()[:16]
+
+
+def request_scope():
+    """(user id to restrict to, or None, section ids) for the authenticated user of this request."""
+    if "scope" not in g:
+        user = getattr(request, "user", None)
+        if not user or not is_restricted(user):
+            g.scope = (None, None)
+        else:
+            sections = cached_sections(user["id"])
+            if sections is None:
+                cur = get_db().cursor()
+                cur.execute(*sections_query(user["id"]))
+                sections = store_sections(user["id"], cur.fetchall())
+                cur.close()
+            g.scope = (user["id"], sections)
+    return g.scope
+
+
+def scope_user():
+    """User id the listing SQL must be restricted to, None for unrestricted users."""
+    return request_scope()[0]
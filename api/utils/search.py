@@ -0,0 +1,6 @@
+# Helpers of the prefix / word searches (GET /personnel/search, GET /auth/users?q=)
+
+
+def like_prefix(text):
+    """LIKE pattern matching values that start with `text` (wildcards escaped)."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+import pymysql
+from flask import has_request_context, request
+from config import SLOW_QUERY_LOG
+
+# Opt-in slow-query log fed by the instrumented cursors (utils/metrics.py).
+# Statements are grouped by shape (normalized SQL); each shape is EXPLAINed
+# once, and every slow execution is appended to a rotating JSON-lines file.
+
+_WS = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+_VALUES_ROWS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+_shapes = {}   # normalized sql -> aggregate
+_lock = threading.Lock()
+_logger = None
+_logger_pid = None
+
+
+def normalize(sql):
+    """Statement shape: literals -> ?, placeholder lists and repeated VALUES rows collapsed."""
+    sql = _WS.sub(" ", sql).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("%s, ...", sql)
+    return _VALUES_ROWS.sub(r"\1, ...", sql)
+
+
+def param_shape(args):
+    """Types of the bound parameters, e.g. ["int", "str"] or {"int": 250} for long lists."""
+    if args is None:
+        return []
+    if isinstance(args, dict):
+        return {k: type(v).__name__ for k, v in args.items()}
+    if not isinstance(args, (list, tuple)):
+        return [type(args).__name__]
+    types = [type(a).__name__ for a in args]
+    return types if len(types) <= 10 else dict(Counter(types))
+
+
+def _get_logger():
+    """Per-process logger (a RotatingFileHandler must not cross a fork)."""
+    global _logger, _logger_pid
+    if _logger is None or _logger_pid != os.getpid():
+        path = SLOW_QUERY_LOG["path"]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=SLOW_QUERY_LOG["max_bytes"],
+                                      backupCount=SLOW_QUERY_LOG["backup_count"], encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger("slow_queries")
+        for old in list(logger.handlers):
+            logger.removeHandler(old)
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _logger, _logger_pid = logger, os.getpid()
+    return _logger
+
+
+def _explain(cursor, query, args):
+    """EXPLAIN on the statement's own connection, with a plain (uninstrumented) cursor."""
+    if not query.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    if isinstance(cursor, pymysql.cursors.SSCursor):
+        return None   # the connection is still streaming the result
+    try:
+        with cursor.connection.cursor(pymysql.cursors.DictCursor) as cur:
+            cur.execute("EXPLAIN " + query, args)
+            return cur.fetchall()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def observe(cursor, query, args, seconds):
+    """Called for every statement; records it when it exceeds the threshold."""
+    if not SLOW_QUERY_LOG["enabled"]:
+        return
+    duration_ms = seconds * 1000
+    if duration_ms < SLOW_QUERY_LOG["threshold_ms"]:
+        return
+
+    shape = normalize(query)
+    route = None
+    if has_request_context():
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+
+    with _lock:
+        entry = _shapes.get(shape)
+        first = entry is None
+        if first:
+            if len(_shapes) >= SLOW_QUERY_LOG["max_shapes"]:
+                return   # keep memory bounded; the file still gets the known shapes
+            entry = _shapes[shape] = {
+                "sql": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "routes": Counter(), "params": param_shape(args), "plan": None,
+            }
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        entry["routes"][route] += 1
+
+    plan = None
+    if first and SLOW_QUERY_LOG["explain"]:
+        plan = _explain(cursor, query, args)
+        with _lock:
+            entry["plan"] = plan
+
+    record = {
+        "ts": round(time.time(), 3),
+        "duration_ms": round(duration_ms, 3),
+        "route": route,
+        "sql": shape,
+        "params": param_shape(args),
+    }
+    if plan is not None:
+        record["plan"] = plan
+    _get_logger().info(json.dumps(record, default=str))
+
+
+def top(n=20):
+    """Slowest statement shapes of this process, by total time."""
+    with _lock:
+        entries = sorted(_shapes.values(), key=lambda e: e["total_ms"], reverse=True)[:n]
+        return [
+            {
+                **e,
+                "total_ms": round(e["total_ms"], 3),
+                "max_ms": round(e["max_ms"], 3),
+                "avg_ms": round(e["total_ms"] / e["count"], 3),
+                "routes": dict(e["routes"].most_common()),
+            }
+            for e in entries
+        ]
+
+
+def reset():
+    with _lock:
+        _shapes.clear()
@@ -0,0 +1,170 @@
+# Headcount counters behind GET /stats (see migrations/0004_headcount_stats.sql):
+#   section.headcount        links of the section
+#   personnel.section_count  links of the personnel (0 = no section)
+#   affectation_stats        personnel and personnel without section, per affectation
+#   user_stats               users per (role, status), total of GET /auth/users (migration 0007)
+# Write handlers call these helpers inside their own transaction, so the counters
+# commit (or roll back) together with the change; the cost is O(changed links).
+from collections import Counter, defaultdict
+
+
+def _in(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _add(cur, table, column, deltas):
+    """column += delta for {id: delta}, one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+    for row_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(row_id)
+    for delta, ids in by_delta.items():
+        cur.execute(f"UPDATE {table} SET {column} = {column} + %s WHERE id IN ({_in(ids)})", (delta, *ids))
+
+
+def _add_affectations(cur, deltas):
+    """Apply {affectation: (headcount delta, unassigned delta)} to affectation_stats."""
+    rows = [(a, h, u) for a, (h, u) in deltas.items() if h or u]
+    if rows:
+        cur.executemany("""
+            INSERT INTO affectation_stats (affectation, headcount, unassigned) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE headcount = headcount + VALUES(headcount),
+                                    unassigned = unassigned + VALUES(unassigned)
+        """, rows)
+
+
+def personnel_added(cur, affectations):
+    """New personnel rows (one affectation each), before any link is added."""
+    counts = Counter(affectations)
+    _add_affectations(cur, {a: (n, n) for a, n in counts.items()})
+
+
+def personnel_moved(cur, personnel_id, affectation):
+    """Call before UPDATE personnel SET affectation = `affectation` WHERE id = `personnel_id`."""
+    cur.execute("SELECT affectation, section_count FROM personnel WHERE id = %s FOR UPDATE", (personnel_id,))
+    row = cur.fetchone()
+    if row is None or row["affectation"] == affectation:
+        return
+    unassigned = int(row["section_count"] == 0)
+    _add_affectations(cur, {row["affectation"]: (-1, -unassigned), affectation: (1, unassigned)})
+
+
+def linked(cur, pairs):
+    """(personnel_id, section_id) links that were just inserted."""
+    if not pairs:
+        return
+    per_personnel = Counter(p for p, _ in pairs)
+    ids = list(per_personnel)
+    cur.execute(f"SELECT id, affectation FROM personnel WHERE id IN ({_in(ids)}) AND section_count = 0 FOR UPDATE",
+                ids)
+    now_assigned = Counter(row["affectation"] for row in cur.fetchall())
+    _add(cur, "personnel", "section_count", per_personnel)
+    _add(cur, "section", "headcount", Counter(s for _, s in pairs))
+    _add_affectations(cur, {a: (0, -n) for a, n in now_assigned.items()})
+
+
+def unlinking(cur, where, params):
+    """
+    Call before DELETE FROM personnel_section ps WHERE `where` (also for the
+    links an ON DELETE CASCADE is about to remove). `where` may only use `ps.`.
+    """
+    cur.execute(f"""
+        UPDATE personnel p
+        JOIN (SELECT ps.personnel_id, COUNT(*) AS n FROM personnel_section ps
+              WHERE {where} GROUP BY ps.personnel_id) d ON d.personnel_id = p.id
+        SET p.section_count = p.section_count - d.n
+    """, params)
+    if cur.rowcount == 0:
+        return
+    cur.execute(f"""
+        UPDATE section s
+        JOIN (SELECT ps.section_id, COUNT(*) AS n FROM personnel_section ps
+              WHERE {where} GROUP BY ps.section_id) d ON d.section_id = s.id
+        SET s.headcount = s.headcount - d.n
+    """, params)
+    cur.execute(f"""
+        SELECT p.affectation, COUNT(*) AS n
+        FROM personnel p
+        WHERE p.section_count = 0
+          AND p.id IN (SELECT ps.personnel_id FROM personnel_section ps WHERE {where})
+        GROUP BY p.affectation
+    """, params)
+    _add_affectations(cur, {row["affectation"]: (0, row["n"]) for row in cur.fetchall()})
+
+
+def personnel_removing(cur, personnel_id):
+    """Call before DELETE FROM personnel WHERE id = `personnel_id`."""
+    unlinking(cur, "ps.personnel_id = %s", (personnel_id,))
+    cur.execute("SELECT affectation FROM personnel WHERE id = %s FOR UPDATE", (personnel_id,))
+    row = cur.fetchone()
+    if row is not None:
+        _add_affectations(cur, {row["affectation"]: (-1, -1)})   # section_count is 0 now
+
+
+def section_removing(cur, section_id):
+    """Call before DELETE FROM section WHERE id = `section_id`."""
+    unlinking(cur, "ps.section_id = %s", (section_id,))
+
+
+def _add_users(cur, deltas):
+    """Apply {(role, status): delta} to user_stats (NULL stored as '')."""
+    rows = [(role or "", status or "", n) for (role, status), n in deltas.items() if n]
+    if rows:
+        cur.executemany("""
+            INSERT INTO user_stats (role, status, users) VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE users = users + VALUES(users)
+        """, rows)
+
+
+def user_added(cur, role, status="active"):
+    _add_users(cur, {(role, status): 1})
+
+
+def user_changing(cur, user_id, role, status):
+    """Call before UPDATE users SET role = `role`, status = `status` (None: unchanged)."""
+    cur.execute("SELECT role, status FROM users WHERE id = %s FOR UPDATE", (user_id,))
+    row = cur.fetchone()
+    if row is None:
+        return
+    old = (row["role"], row["status"])
+    new = (role, row["status"] if status is None else status)
+    if old != new:
+        _add_users(cur, {old: -1, new: 1})
+
+
+def user_removing(cur, user_id):
+    """Call before DELETE FROM users WHERE id = `user_id`."""
+    cur.execute("SELECT role, status FROM users WHERE id = %s FOR UPDATE", (user_id,))
+    row = cur.fetchone()
+    if row is not None:
+        _add_users(cur, {(row["role"], row["status"]): -1})
+
+
+def rebuild(cur):
+    """Recompute every counter from the tables (after bulk loads that bypass the API)."""
+    cur.execute("""
+        UPDATE section s
+        LEFT JOIN (SELECT section_id, COUNT(*) AS n FROM personnel_section GROUP BY section_id) c
+               ON c.section_id = s.id
+        SET s.headcount = COALESCE(c.n, 0)
+    """)
+    cur.execute("""
+        UPDATE personnel p
+        LEFT JOIN (SELECT personnel_id, COUNT(*) AS n FROM personnel_section GROUP BY personnel_id) c
+               ON c.personnel_id = p.id
+        SET p.section_count = COALESCE(c.n, 0)
+    """)
+    cur.execute("DELETE FROM affectation_stats")
+    cur.execute("""
+        INSERT INTO affectation_stats (affectation, headcount, unassigned)
+        SELECT affectation, COUNT(*), SUM(section_count = 0)
+        FROM personnel
+        GROUP BY affectation
+    """)
+    cur.execute("DELETE FROM user_stats")
+    cur.execute("""
+        INSERT INTO user_stats (role, status, users)
+        SELECT COALESCE(role, ''), COALESCE(status, ''), COUNT(*)
+        FROM users
+        GROUP BY COALESCE(role, ''), COALESCE(status, '')
+    """)
@@ -0,0 +1,76 @@
+import hashlib
+from functools import wraps
+import pymysql
+from flask import Response, g, make_response, request
+from utils.columnar import variant_args
+from utils.db import get_db
+from utils.scope import request_scope, scope_key
+
+# Per-table change counters stored in `table_versions` (see migrations/0001_baseline.sql).
+# Write handlers bump them inside their transaction; read handlers derive
+# their ETag from them without running the (expensive) listing query.
+
+
+def bump_versions(cur, *tables):
+    """Increment the version of `tables`; call before conn.commit()."""
+    placeholders = ", ".join(["%s"] * len(tables))
+    try:
+        cur.execute(
+            f"UPDATE table_versions SET version = version + 1 WHERE table_name IN ({placeholders})",
+            tables,
+        )
+    except pymysql.err.ProgrammingError:
+        pass   # schema without table_versions: ETags are disabled as well
+
+
+def versions_query(tables):
+    """(sql, params) reading the version of `tables`; rows are {table_name, version}."""
+    placeholders = ", ".join(["%s"] * len(tables))
+    return f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})", tables
+
+
+def read_versions(cur, tables):
+    cur.execute(*versions_query(tables))
+    return {row["table_name"]: row["version"] for row in cur.fetchall()}
+
+
+def compute_etag(path, arg_items, versions):
+    """ETag (unquoted) of a response that only depends on path, query string and table versions."""
+    key = "|".join([path, repr(sorted(arg_items)), repr(sorted(versions.items()))])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def conditional_get(*tables):
+    """
+    Strong ETag for a GET handler whose body only depends on `tables` and the
+    query string. A matching If-None-Match gets a 304 before the handler runs.
+    """
+    def wrapper(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            # A user restricted by user_section gets their own variant of every listing
+            scoped_user, sections = request_scope()
+            read = tables if scoped_user is None else (*tables, "user_section")
+            try:
+                cur = get_db().cursor()
+                versions = read_versions(cur, read)
+                cur.close()
+            except pymysql.err.ProgrammingError:
+                return f(*args, **kwargs)   # schema without table_versions: plain GET
+
+            g.table_versions = versions   # also part of the listing cache key
+            g.scope_key = scope_key(sections)
+            arg_items = variant_args() + ([("~scope", g.scope_key)] if g.scope_key else [])
+            tag = compute_etag(request.path, arg_items, versions)
+            # Weak comparison (RFC 7232): compressed responses carry a weak ETag
+            if request.if_none_match.contains_weak(tag):
+                response = Response(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(tag)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return decorated
+    return wrapper
@@ -0,0 +1,104 @@
+"""Benchmarks of every auth_bp route (bcrypt-bound routes run fewer rounds)."""
+import itertools
+
+import pytest
+from flask import Flask
+import generate_dataset
+from config import TOKEN_CACHE, USER_CACHE
+from utils import stats
+from utils.auth import generate_token, invalidate_user, store_user, token_required
+from utils.passwords import hash_password
+
+BENCH_HASH = hash_password("bench123")
+LISTED_USERS = 100_000
+
+
+@pytest.fixture(scope="module")
+def many_users(database):
+    """LISTED_USERS extra accounts (once per session: users survive dataset reloads)."""
+    roles = itertools.cycle(["customer"] * 8 + ["manager", "admin"])
+    statuses = itertools.cycle(["active"] * 18 + ["inactive", "suspended"])
+    rows = ((f"Prenom{n % 997}", f"Nom{n:06d}", f"listed{n}@example.com", BENCH_HASH, next(roles), next(statuses))
+            for n in range(LISTED_USERS))
+    with database.cursor() as cur:
+        cur.execute("SELECT COUNT(*) AS n FROM users WHERE email LIKE 'listed%'")
+        if cur.fetchone()["n"] == 0:
+            generate_dataset.load_rows(database, "users", ("firstname", "lastname", "email", "password", "role", "status"),
+                                       rows, "insert", 10_000)
+        stats.rebuild(cur)
+        cur.execute("ANALYZE TABLE users")
+        cur.fetchall()
+
+
+def bench_signup(benchmark, client, unique):
+    def signup():
+        n = next(unique)
+        return client.post("/auth/signup", json={
+            "firstname": "Bench", "lastname": str(n), "email": f"bench{n}@example.com", "password": "bench123",
+        })
+    r = benchmark.pedantic(signup, rounds=10)
+    assert r.status_code == 200
+
+
+def bench_login(benchmark, client):
+    r = benchmark.pedantic(client.post, args=("/auth/login",),
+                           kwargs={"json": {"email": "admin@example.com", "password": "admin123"}}, rounds=10)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("query", ["", "?limit=1000", "?q=listed12", "?q=Nom0421", "?q=prenom9",
+                                   "?role=manager", "?status=suspended", "?role=admin&status=inactive&q=Nom"])
+def bench_list_users(benchmark, client, admin_headers, many_users, query):
+    r = benchmark(client.get, f"/auth/users{query}", headers=admin_headers)
+    assert r.status_code == 200
+
+
+def bench_list_users_next_page(benchmark, client, admin_headers, many_users):
+    cursor = client.get("/auth/users?limit=100&status=active", headers=admin_headers).json["next_cursor"]
+    r = benchmark(client.get, f"/auth/users?limit=100&status=active&cursor={cursor}", headers=admin_headers)
+    assert r.status_code == 200
+
+
+def bench_count_users(benchmark, database, many_users):
+    """What the listing total would cost as a COUNT(*) on every page."""
+    def count():
+        with database.cursor() as cur:
+            cur.execute("SELECT COUNT(*) AS n FROM users WHERE status = 'active'")
+            return cur.fetchone()
+    benchmark(count)
+
+
+def _create_user(database, n):
+    with database.cursor() as cur:
+        cur.execute("INSERT INTO users (firstname, lastname, email, password) VALUES ('Bench', %s, %s, %s)",
+                    (str(n), f"benchuser{n}@example.com", BENCH_HASH))
+        stats.user_added(cur, "customer")
+        return cur.lastrowid
+
+
+def bench_update_user(benchmark, client, admin_headers, database, unique):
+    user_id = _create_user(database, next(unique))
+    r = benchmark(client.put, f"/auth/users/{user_id}", headers=admin_headers,
+                  json={"firstname": "Bench", "lastname": "Updated", "role": "customer"})
+    assert r.status_code == 200
+
+
+def bench_delete_user(benchmark, client, admin_headers, database, unique):
+    r = benchmark.pedantic(lambda user_id: client.delete(f"/auth/users/{user_id}", headers=admin_headers),
+                           setup=lambda: ((_create_user(database, next(unique)),), {}), rounds=50)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("token_cache", [False, True], ids=["decode", "cached"])
+def bench_token_required(benchmark, monkeypatch, token_cache):
+    """@token_required overhead per request; no database (the user entry is pre-loaded)."""
+    monkeypatch.setitem(TOKEN_CACHE, "enabled", token_cache)
+    monkeypatch.setitem(USER_CACHE, "ttl", 3600)   # keep the pre-loaded entry for the whole run
+    store_user(1, {"role": "admin", "status": "active", "token_version": 0, "extra_roles": None})
+    view = token_required(lambda: "ok")
+    headers = {"Authorization": f"Bearer {generate_token(1, 'admin@example.com', 'admin')}"}
+    try:
+        with Flask(__name__).test_request_context("/", headers=headers):
+            assert benchmark(view) == "ok"
+    finally:
+        invalidate_user(1)
@@ -0,0 +1,81 @@
+"""Benchmarks of POST /batch against the equivalent single calls."""
+import pytest
+
+OPERATIONS = 20
+
+
+def _section_ops(dataset, n):
+    """Rename + relink the first sections; `n` keeps every run a real change."""
+    personnel = dataset["personnel_ids"][n % 2 * 5:][:5]
+    return [{"op": "update", "entity": "section", "id": sid,
+             "data": {"code_section": 70_000_000 + sid, "label": f"Batch {sid} {n}", "unit": "BENCH",
+                      "type": "Technical", "personnels": personnel}}
+            for sid in dataset["section_ids"][:OPERATIONS]]
+
+
+def bench_single_updates(benchmark, client, admin_headers, dataset, unique):
+    def run():
+        for op in _section_ops(dataset, next(unique)):
+            r = client.put(f"/section/update/{op['id']}", headers=admin_headers, json=op["data"])
+        return r
+    r = benchmark(run)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("mode", ["atomic", "best_effort"])
+def bench_batch_updates(benchmark, client, admin_headers, dataset, unique, mode):
+    r = benchmark(lambda: client.post("/batch", headers=admin_headers,
+                                      json={"mode": mode, "operations": _section_ops(dataset, next(unique))}))
+    assert r.status_code == 200 and r.json["success"]
+
+
+def _reorganization_rows(client, headers, unique):
+    """OPERATIONS new sections and personnel (untimed), created with one batch."""
+    n = next(unique)
+    operations = [{"op": "create", "entity": "section",
+                   "data": {"code_section": 90_000_000 + n * 100 + i, "label": f"Reorg {n} {i}",
+                            "unit": "BENCH", "type": "Technical"}} for i in range(OPERATIONS)]
+    operations += [{"op": "create", "entity": "personnel",
+                    "data": {"matricule": f"REORG{n:06d}{i:03d}", "nom": f"Reorg {i}",
+                             "qualification": "Technicien", "affectation": "Bench"}} for i in range(OPERATIONS)]
+    ids = [r["id"] for r in client.post("/batch", headers=headers, json={"operations": operations}).json["results"]]
+    return ids[:OPERATIONS], ids[OPERATIONS:]
+
+
+def _reorganization_ops(sections, personnel):
+    """Rename and relink every section, delete every personnel."""
+    ops = [{"op": "update", "entity": "section", "id": sid,
+            "data": {"code_section": 80_000_000 + sid, "label": f"Reorganized {sid}", "unit": "BENCH",
+                     "type": "Technical", "personnels": personnel[:5]}} for sid in sections]
+    return ops + [{"op": "delete", "entity": "personnel", "id": pid} for pid in personnel]
+
+
+def _single_calls(client, headers, operations):
+    for op in operations:
+        if op["entity"] == "section":
+            r = client.put(f"/section/update/{op['id']}", headers=headers, json=op["data"])
+        else:
+            r = client.delete(f"/personnel/{op['id']}", headers=headers)
+    return r
+
+
+@pytest.mark.parametrize("mode", ["single", "atomic", "best_effort"])
+def bench_reorganization(benchmark, client, admin_headers, unique, mode):
+    """Section updates + personnel deletes on fresh rows, as single calls or one /batch."""
+    created = []
+
+    def setup():
+        sections, personnel = _reorganization_rows(client, admin_headers, unique)
+        created.append(sections)
+        return (_reorganization_ops(sections, personnel),), {}
+
+    def run(operations):
+        if mode == "single":
+            return _single_calls(client, admin_headers, operations)
+        return client.post("/batch", headers=admin_headers, json={"mode": mode, "operations": operations})
+
+    r = benchmark.pedantic(run, setup=setup, rounds=5)
+    assert r.status_code == 200
+    for sections in created:
+        client.post("/batch", headers=admin_headers,
+                    json={"operations": [{"op": "delete", "entity": "section", "id": sid} for sid in sections]})
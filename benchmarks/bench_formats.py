@@ -0,0 +1,52 @@
+"""Serialization and compression of the two list formats; no database needed."""
+import random
+
+import pytest
+from flask import Flask, jsonify
+
+from generate_dataset import gen_personnel
+from utils.compression import brotli, compress
+
+ROWS = 100_000
+COLUMNS = ["id", "matricule", "nom", "qualification", "affectation", "sections"]
+
+
+@pytest.fixture(scope="module")
+def rows():
+    rng = random.Random(1)
+    return [(*row, "Production - centre 12, Qualité - centre 40") for row in gen_personnel(rng, 1, ROWS)]
+
+
+@pytest.fixture(scope="module")
+def flask_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def _objects(rows):
+    # DictCursor builds one dict per row before jsonify sees it
+    data = [dict(zip(COLUMNS, t)) for t in rows]
+    return jsonify({"success": True, "data": data, "next_cursor": None}).get_data()
+
+
+def _columns(rows):
+    return jsonify({"success": True, "columns": COLUMNS, "rows": rows, "next_cursor": None}).get_data()
+
+
+FORMATS = {"objects": _objects, "columns": _columns}
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def bench_serialize(benchmark, flask_context, rows, fmt):
+    body = benchmark.pedantic(FORMATS[fmt], args=(rows,), rounds=3, iterations=1)
+    benchmark.extra_info["bytes"] = len(body)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+@pytest.mark.parametrize("fmt", FORMATS)
+def bench_compress(benchmark, flask_context, rows, fmt, encoding):
+    if encoding == "br" and brotli is None:
+        pytest.skip("brotli is not installed")
+    body = FORMATS[fmt](rows)
+    packed = benchmark.pedantic(compress, args=(body, encoding), rounds=3, iterations=1)
+    benchmark.extra_info["bytes"] = len(packed)
@@ -0,0 +1,82 @@
+"""The hot filters with the secondary indexes of migration 0002 and without them."""
+import os
+
+import pytest
+
+from config import PAGINATION
+from migrate import MIGRATIONS_DIR, split_statements
+from personnel.personnel import _personnel_page_query
+from section.section import _preview_query, _section_page_query
+
+# Back to the baseline schema: the implicit foreign-key index on section_id instead
+# of the covering one, and no affectation / nom / type index
+WITHOUT_0002 = [
+    "CREATE INDEX fk_section ON personnel_section (section_id)",
+    "DROP INDEX idx_personnel_section_section ON personnel_section",
+    "DROP INDEX idx_personnel_affectation ON personnel",
+    "DROP INDEX idx_personnel_nom ON personnel",
+    "DROP INDEX idx_section_type ON section",
+]
+
+
+def _analyze(cur):
+    cur.execute("ANALYZE TABLE personnel, section, personnel_section")
+    cur.fetchall()
+
+
+@pytest.fixture(scope="module", params=["0002", "baseline"])
+def indexes(request, database, dataset):
+    if request.param == "0002":
+        yield request.param
+        return
+    with database.cursor() as cur:
+        for sql in WITHOUT_0002:
+            cur.execute(sql)
+        _analyze(cur)
+    try:
+        yield request.param
+    finally:
+        with open(os.path.join(MIGRATIONS_DIR, "0002_secondary_indexes.sql"), encoding="utf-8") as f:
+            statements = split_statements(f.read())
+        with database.cursor() as cur:
+            for sql in statements:
+                cur.execute(sql)
+            _analyze(cur)
+
+
+def _workload(cur, dataset):
+    """label -> (sql, params, is_write): the statements the indexes are meant for."""
+    cur.execute("SELECT nom FROM personnel WHERE id = %s", (dataset["personnel_ids"][0],))
+    nom = cur.fetchone()["nom"]
+    personnel_sql, personnel_params, _ = _personnel_page_query({"affectation": "Production"})
+    section_sql, section_params, _ = _section_page_query({"type": "Financial"})
+    return {
+        "personnel_affectation": (personnel_sql, personnel_params, False),
+        "section_type": (section_sql, section_params, False),
+        "section_preview": (*_preview_query(dataset["section_ids"][:PAGINATION["default_limit"]],
+                                            PAGINATION["preview_size"]), False),
+        "personnel_nom": ("SELECT id, matricule FROM personnel WHERE nom = %s", (nom,), False),
+        "delete_section_links": ("DELETE FROM personnel_section WHERE section_id = %s",
+                                 (dataset["section_ids"][0],), True),
+    }
+
+
+@pytest.mark.parametrize("query", ["personnel_affectation", "section_type", "section_preview",
+                                   "personnel_nom", "delete_section_links"])
+def bench_query(benchmark, database, dataset, indexes, query):
+    with database.cursor() as cur:
+        sql, params, is_write = _workload(cur, dataset)[query]
+        cur.execute("EXPLAIN " + sql, params)
+        benchmark.extra_info["plan"] = [{k: row.get(k) for k in ("table", "type", "key", "rows")}
+                                        for row in cur.fetchall()]
+
+    def run():
+        with database.cursor() as cur:
+            if is_write:
+                database.begin()   # the session is in autocommit: roll the DELETE back
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            if is_write:
+                database.rollback()
+            return rows
+    benchmark(run)
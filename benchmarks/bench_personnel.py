@@ -0,0 +1,136 @@
+"""Benchmarks of every personnel_bp route."""
+import itertools
+from urllib.parse import quote
+
+import pytest
+from utils import stats
+
+
+@pytest.mark.parametrize("query", ["", "?limit=20", "?limit=1000", "?affectation=Production", "?section_id=1"])
+def bench_list(benchmark, client, admin_headers, query):
+    r = benchmark(client.get, f"/personnel/all{query}", headers=admin_headers)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("query", ["q=G0000001", "q=Martin", "q=Helene", "q=Dubois%20Jean",
+                                   "section={section}", "q=Mar&section={section}"])
+def bench_search(benchmark, client, admin_headers, dataset, query):
+    query = query.format(section=quote(dataset["section_label"]))
+    r = benchmark(client.get, f"/personnel/search?{query}", headers=admin_headers)
+    assert r.status_code == 200
+
+
+def bench_list_next_page(benchmark, client, admin_headers):
+    cursor = client.get("/personnel/all?limit=100", headers=admin_headers).json["next_cursor"]
+    r = benchmark(client.get, f"/personnel/all?limit=100&cursor={cursor}", headers=admin_headers)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def bench_export(benchmark, client, admin_headers, fmt):
+    def export():
+        r = client.get(f"/personnel/export?format={fmt}", headers=admin_headers)
+        r.get_data()   # drain the stream
+        return r
+    r = benchmark.pedantic(export, rounds=3, iterations=1)
+    assert r.status_code == 200
+
+
+def bench_get_by_id(benchmark, client, admin_headers, dataset):
+    ids = itertools.cycle(dataset["personnel_ids"])
+    r = benchmark(lambda: client.get(f"/personnel/{next(ids)}", headers=admin_headers))
+    assert r.status_code == 200
+
+
+def bench_get_batch(benchmark, client, admin_headers, dataset):
+    ids = ",".join(map(str, dataset["personnel_ids"][:50]))
+    r = benchmark(lambda: client.get(f"/personnel?ids={ids}", headers=admin_headers))
+    assert r.status_code == 200
+
+
+def bench_get_sections(benchmark, client, admin_headers, dataset):
+    ids = itertools.cycle(dataset["personnel_ids"])
+    r = benchmark(lambda: client.get(f"/personnel/{next(ids)}/sections", headers=admin_headers))
+    assert r.status_code == 200
+
+
+def bench_add(benchmark, client, admin_headers, dataset, unique):
+    sections = dataset["section_ids"][:3]
+
+    def add():
+        n = next(unique)
+        return client.post("/personnel/add", headers=admin_headers, json={
+            "matricule": f"BENCH{n:08d}", "nom": f"Bench {n}", "qualification": "Technicien",
+            "affectation": "Production", "sections": sections,
+        })
+    r = benchmark(add)
+    assert r.status_code == 201
+
+
+@pytest.mark.parametrize("rows", [100, 1000])
+def bench_bulk_import(benchmark, client, admin_headers, unique, rows):
+    def payload():
+        n = next(unique)
+        lines = ["matricule,nom,qualification,affectation"]
+        lines += [f"BULK{n:06d}{i:05d},Bulk {i},Technicien,Production" for i in range(rows)]
+        return (), {"data": "\n".join(lines), "headers": {**admin_headers, "Content-Type": "text/csv"}}
+
+    r = benchmark.pedantic(lambda data, headers: client.post("/personnel/bulk", data=data, headers=headers),
+                           setup=payload, rounds=5)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("batch_size", [500, 1000, 5000])
+def bench_bulk_import_100k(benchmark, client, admin_headers, database, dataset, unique, batch_size):
+    """100k rows with 0-2 sections each in one streamed upload; the rows are removed afterwards."""
+    sections = dataset["section_ids"][:10]
+    prefix = f"BULKL{next(unique):05d}-"
+
+    def cleanup():
+        with database.cursor() as cur:
+            cur.execute("DELETE FROM personnel WHERE matricule LIKE %s", (prefix + "%",))
+            stats.rebuild(cur)
+
+    def payload():
+        cleanup()   # the previous round's rows
+        lines = ["matricule,nom,qualification,affectation,sections"]
+        lines += [f"{prefix}{i:07d},Employe {i},Agent,Production,"
+                  + ";".join(str(sections[(i + k) % len(sections)]) for k in range(i % 3))
+                  for i in range(100_000)]
+        return (), {"data": "\n".join(lines), "headers": {**admin_headers, "Content-Type": "text/csv"}}
+
+    try:
+        r = benchmark.pedantic(
+            lambda data, headers: client.post(f"/personnel/bulk?batch_size={batch_size}", data=data, headers=headers),
+            setup=payload, rounds=2)
+        assert r.status_code == 200 and r.json["inserted"] == 100_000
+    finally:
+        cleanup()
+
+
+def bench_update(benchmark, client, admin_headers, dataset):
+    pid = dataset["personnel_ids"][0]
+    row = client.get(f"/personnel/{pid}", headers=admin_headers).json["data"]
+    body = {k: row[k] for k in ("matricule", "nom", "qualification", "affectation")}
+    section_sets = itertools.cycle([dataset["section_ids"][:2], dataset["section_ids"][1:4]])
+    r = benchmark(lambda: client.put(f"/personnel/{pid}", headers=admin_headers,
+                                     json={**body, "sections": next(section_sets)}))
+    assert r.status_code == 200
+
+
+def bench_delete(benchmark, client, admin_headers, database, dataset, unique):
+    def create():
+        n = next(unique)
+        with database.cursor() as cur:
+            cur.execute("INSERT INTO personnel (matricule, nom, qualification, affectation) "
+                        "VALUES (%s, 'Bench', 'Technicien', 'Production')", (f"DEL{n:08d}",))
+            pid = cur.lastrowid
+            cur.execute("INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)",
+                        (pid, dataset["section_ids"][0]))
+            stats.personnel_added(cur, ["Production"])
+            stats.linked(cur, [(pid, dataset["section_ids"][0])])
+        return (pid,), {}
+
+    r = benchmark.pedantic(lambda pid: client.delete(f"/personnel/{pid}", headers=admin_headers),
+                           setup=create, rounds=50)
+    assert r.status_code == 200
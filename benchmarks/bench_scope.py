@@ -0,0 +1,30 @@
+"""Listings of a user restricted by user_section against the same listings unrestricted."""
+import itertools
+
+import pytest
+
+LISTINGS = ["/personnel/all", "/personnel/all?limit=1000", "/personnel/all?affectation=Production",
+            "/personnel/search?q=Martin", "/section/all", "/section/all?limit=1000"]
+
+
+@pytest.fixture(params=["admin", "scoped"])
+def headers(request):
+    return request.getfixturevalue(f"{request.param}_headers")
+
+
+@pytest.mark.parametrize("path", LISTINGS)
+def bench_listing(benchmark, client, headers, path):
+    r = benchmark(client.get, path, headers=headers)
+    assert r.status_code == 200
+
+
+def bench_listing_next_page(benchmark, client, headers):
+    cursor = client.get("/personnel/all?limit=100", headers=headers).json["next_cursor"]
+    r = benchmark(client.get, f"/personnel/all?limit=100&cursor={cursor}", headers=headers)
+    assert r.status_code == 200
+
+
+def bench_get_by_id(benchmark, client, headers, dataset):
+    ids = itertools.cycle(dataset["personnel_ids"])
+    r = benchmark(lambda: client.get(f"/personnel/{next(ids)}", headers=headers))
+    assert r.status_code in (200, 404)   # out of scope personnel are not found
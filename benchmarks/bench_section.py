@@ -0,0 +1,62 @@
+"""Benchmarks of every section_bp route."""
+import itertools
+
+import pytest
+from utils import stats
+
+
+@pytest.mark.parametrize("query", ["", "?limit=20", "?limit=1000", "?type=Financial"])
+def bench_list(benchmark, client, admin_headers, query):
+    r = benchmark(client.get, f"/section/all{query}", headers=admin_headers)
+    assert r.status_code == 200
+
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def bench_export(benchmark, client, admin_headers, fmt):
+    def export():
+        r = client.get(f"/section/export?format={fmt}", headers=admin_headers)
+        r.get_data()
+        return r
+    r = benchmark.pedantic(export, rounds=3, iterations=1)
+    assert r.status_code == 200
+
+
+def bench_add(benchmark, client, admin_headers, dataset, unique):
+    personnel = dataset["personnel_ids"][:10]
+
+    def add():
+        n = next(unique)
+        return client.post("/section/add", headers=admin_headers, json={
+            "code_section": 50_000_000 + n, "label": f"Bench {n}", "unit": "BENCH",
+            "type": "Technical", "personnels": personnel,
+        })
+    r = benchmark(add)
+    assert r.status_code == 201
+
+
+def bench_update(benchmark, client, admin_headers, dataset):
+    sid = dataset["section_ids"][0]
+    rows = client.get("/section/all?limit=1000", headers=admin_headers).json["data"]
+    row = next((s for s in rows if s["id"] == sid), rows[0])
+    body = {k: row[k] for k in ("code_section", "label", "unit", "type")}
+    personnel_sets = itertools.cycle([dataset["personnel_ids"][:20], dataset["personnel_ids"][10:30]])
+    r = benchmark(lambda: client.put(f"/section/update/{row['id']}", headers=admin_headers,
+                                     json={**body, "personnels": next(personnel_sets)}))
+    assert r.status_code == 200
+
+
+def bench_delete(benchmark, client, admin_headers, database, dataset, unique):
+    def create():
+        n = next(unique)
+        with database.cursor() as cur:
+            cur.execute("INSERT INTO section (code_section, label, unit, type) "
+                        "VALUES (%s, 'Bench', 'BENCH', 'Technical')", (60_000_000 + n,))
+            sid = cur.lastrowid
+            pairs = [(pid, sid) for pid in dataset["personnel_ids"][:20]]
+            cur.executemany("INSERT INTO personnel_section (personnel_id, section_id) VALUES (%s, %s)", pairs)
+            stats.linked(cur, pairs)
+        return (sid,), {}
+
+    r = benchmark.pedantic(lambda sid: client.delete(f"/section/delete/{sid}", headers=admin_headers),
+                           setup=create, rounds=50)
+    assert r.status_code == 200
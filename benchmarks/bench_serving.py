@@ -0,0 +1,194 @@
+"""
+Concurrent clients: the connection pool, reads during a burst of logins, and the
+WSGI (python api/serve.py) against the ASGI (uvicorn asgi:app) server over real
+sockets. Latency percentiles and throughput go to extra_info
+(--benchmark-json), next to pytest-benchmark's own statistics.
+
+BENCH_CLIENTS     concurrent clients of bench_serving_mode, default 500
+BENCH_REQUESTS    requests per client of bench_serving_mode, default 10
+"""
+import asyncio
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config import POOL_CONFIG, SERVER
+from utils import db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ["/personnel/all", "/section/all", "/personnel/all?limit=20"]
+THREADS = 8          # keep <= POOL_CONFIG["max_size"]
+REQUESTS = 20        # per thread and round
+CLIENTS = int(os.environ.get("BENCH_CLIENTS", 500))
+CLIENT_REQUESTS = int(os.environ.get("BENCH_REQUESTS", 10))
+LOGIN = {"email": "admin@example.com", "password": "admin123"}
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def latency_info(latencies):
+    """p50 / p95 / p99 in ms of per-request timings (seconds)."""
+    return {f"p{p}_ms": round(percentile(latencies, p) * 1000, 2) for p in (50, 95, 99)}
+
+
+def _wsgi_round(app, headers, paths, threads=THREADS):
+    """`threads` test clients, REQUESTS sequential GETs each."""
+    def client_loop(n):
+        client = app.test_client()
+        for k in range(REQUESTS):
+            r = client.get(paths[(n + k) % len(paths)], headers=headers)
+            assert r.status_code == 200, r.status_code
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(client_loop, range(threads)))
+
+
+@pytest.mark.parametrize("pool", ["on", "off"])
+def bench_pool(benchmark, app, client, admin_headers, monkeypatch, pool):
+    monkeypatch.setitem(POOL_CONFIG, "enabled", pool == "on")
+    try:
+        benchmark.pedantic(_wsgi_round, args=(app, admin_headers, ["/personnel/all"]), rounds=5)
+        benchmark.extra_info["pool"] = db.pool_stats()
+    finally:
+        db.close_pool()
+
+
+@pytest.mark.parametrize("logins", [0, 50])
+def bench_list_during_logins(benchmark, app, client, admin_headers, logins):
+    """GET /personnel/all while `logins` threads loop on /auth/login; 503s are the hash pool shedding load."""
+    stop = threading.Event()
+    outcomes = {"ok": 0, "shed_503": 0, "other": 0}
+    lock = threading.Lock()
+
+    def login_loop():
+        login_client = app.test_client()
+        while not stop.is_set():
+            r = login_client.post("/auth/login", json=LOGIN)
+            key = "ok" if r.status_code == 200 else "shed_503" if r.status_code == 503 else "other"
+            with lock:
+                outcomes[key] += 1
+
+    latencies = []
+
+    def timed_get():
+        start = time.perf_counter()
+        r = client.get("/personnel/all", headers=admin_headers)
+        latencies.append(time.perf_counter() - start)
+        return r
+
+    loops = [threading.Thread(target=login_loop) for _ in range(logins)]
+    for t in loops:
+        t.start()
+    try:
+        r = benchmark.pedantic(timed_get, rounds=200, warmup_rounds=5)
+    finally:
+        stop.set()
+        for t in loops:
+            t.join()
+    assert r.status_code == 200
+    benchmark.extra_info.update(latency_info(latencies[5:]), logins=outcomes)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_listening(proc, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            pytest.fail(f"server exited with status {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    pytest.fail(f"server not listening on port {port} after {timeout}s")
+
+
+@pytest.fixture
+def server(request, dataset):
+    """Base URL of a real server on the benchmark database, with SERVER["workers"] workers."""
+    mode = request.param
+    port = _free_port()
+    env = {**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY") or secrets.token_hex(32),
+           "API_BIND": f"127.0.0.1:{port}"}
+    if mode == "wsgi":
+        pytest.importorskip("gunicorn")
+        cmd = [sys.executable, os.path.join(ROOT, "api", "serve.py")]
+    else:
+        for name in ("uvicorn", "aiomysql", "a2wsgi"):
+            pytest.importorskip(name)
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:app", "--app-dir", os.path.join(ROOT, "api"),
+               "--host", "127.0.0.1", "--port", str(port), "--workers", str(SERVER["workers"]),
+               "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+    try:
+        _wait_listening(proc, port)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=SERVER["graceful_timeout"] + 5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+async def _load(base_url, token, clients, requests):
+    """`clients` concurrent keep-alive clients, `requests` sequential GETs each -> (latencies, errors)."""
+    import httpx
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        async def client_loop(n):
+            nonlocal errors
+            for k in range(requests):
+                start = time.perf_counter()
+                try:
+                    ok = (await client.get(PATHS[(n + k) % len(PATHS)])).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+        await asyncio.gather(*(client_loop(n) for n in range(clients)))
+    return latencies, errors
+
+
+@pytest.mark.parametrize("server", ["wsgi", "asgi"], indirect=True)
+def bench_serving_mode(benchmark, server):
+    """CLIENTS concurrent clients over real sockets on the read endpoints the ASGI app serves natively."""
+    httpx = pytest.importorskip("httpx")
+    res = httpx.post(f"{server}/auth/login", json=LOGIN, timeout=30)
+    res.raise_for_status()
+    token = res.json()["token"]
+    asyncio.run(_load(server, token, min(CLIENTS, 50), 2))   # warm up connections and workers
+
+    latencies, errors = [], []
+
+    def run():
+        started = time.perf_counter()
+        lat, err = asyncio.run(_load(server, token, CLIENTS, CLIENT_REQUESTS))
+        latencies.append((lat, time.perf_counter() - started))
+        errors.append(err)
+
+    benchmark.pedantic(run, rounds=3)
+    lat = [x for round_lat, _ in latencies for x in round_lat]
+    elapsed = sum(seconds for _, seconds in latencies)
+    benchmark.extra_info.update(latency_info(lat), clients=CLIENTS, errors=sum(errors),
+                                requests_per_s=round(len(lat) / elapsed, 1))
@@ -0,0 +1,33 @@
+"""Benchmarks of every stats_bp route, and of the aggregation they replace."""
+import pytest
+
+
+@pytest.mark.parametrize("path", ["/stats", "/stats/sections", "/stats/sections?empty=1",
+                                  "/stats/sections?type=Financial", "/stats/unassigned"])
+def bench_read(benchmark, client, admin_headers, path):
+    r = benchmark(client.get, path, headers=admin_headers)
+    assert r.status_code == 200
+
+
+def bench_aggregate_links(benchmark, database, dataset):
+    """What /stats would cost computed from personnel_section on every read (O(links))."""
+    def aggregate():
+        with database.cursor() as cur:
+            cur.execute("""
+                SELECT s.type, COUNT(ps.personnel_id) AS headcount
+                FROM section s LEFT JOIN personnel_section ps ON ps.section_id = s.id
+                GROUP BY s.type
+            """)
+            cur.fetchall()
+            cur.execute("""
+                SELECT p.affectation, COUNT(*) AS headcount,
+                       SUM(NOT EXISTS (SELECT 1 FROM personnel_section ps WHERE ps.personnel_id = p.id)) AS unassigned
+                FROM personnel p GROUP BY p.affectation
+            """)
+            return cur.fetchall()
+    benchmark(aggregate)
+
+
+def bench_rebuild(benchmark, client, admin_headers, dataset):
+    r = benchmark.pedantic(lambda: client.post("/stats/rebuild", headers=admin_headers), rounds=3, iterations=1)
+    assert r.status_code == 200
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Compare two pytest-benchmark JSON results and flag regressions.
+
+    cd benchmarks
+    python -m pytest --benchmark-json=results/base.json
+    ...change code...
+    python -m pytest --benchmark-json=results/new.json
+    python compare.py results/base.json results/new.json --threshold 10
+
+Exits with status 1 when a benchmark got slower than --threshold percent
+(on --stat, median by default), so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {b["fullname"]: b["stats"] for b in data["benchmarks"]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    parser.add_argument("--stat", default="median", choices=("min", "median", "mean", "max"))
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    regressions = 0
+    print(f"{'benchmark':<70} {'base ms':>10} {'new ms':>10} {'change':>8}")
+    for name in sorted(set(base) | set(new)):
+        if name not in base or name not in new:
+            print(f"{name:<70} {'only in ' + ('new' if name in new else 'base'):>30}")
+            continue
+        before, after = base[name][args.stat] * 1000, new[name][args.stat] * 1000
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:<70} {before:>10.3f} {after:>10.3f} {change:>+7.1f}%{flag}")
+
+    print(f"\n{regressions} regression(s) above {args.threshold:g}% on {args.stat}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Fixtures of the endpoint benchmarks: a disposable MariaDB database, loaded
+at several data sizes, and the Flask app driven through its test client.
+
+BENCH_DB_NAME     database created (and DROPPED) for the run, default comptabilite_bench
+BENCH_SIZES       comma-separated subset of SIZES, default "small,medium" (xlarge: 1M links)
+BENCH_CACHE       1 keeps the listing cache on (default off: measure the SQL path)
+DB_HOST, DB_USER, DB_PASSWORD as for the API.
+"""
+import itertools
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DB = os.environ.get("BENCH_DB_NAME", "comptabilite_bench")
+if "bench" not in BENCH_DB:
+    raise pytest.UsageError(f"BENCH_DB_NAME={BENCH_DB!r} is dropped by the benchmarks; its name must contain 'bench'")
+os.environ["DB_NAME"] = BENCH_DB   # before config.py is imported
+sys.path.insert(0, os.path.join(ROOT, "api"))
+sys.path.insert(0, ROOT)
+
+import pymysql  # noqa: E402
+from config import CACHE_CONFIG, db_config  # noqa: E402
+import generate_dataset  # noqa: E402
+import migrate  # noqa: E402
+from utils import stats  # noqa: E402
+
+# name -> (personnel, sections, links)
+SIZES = {
+    "small": (1_000, 100, 3_000),
+    "medium": (20_000, 1_000, 60_000),
+    "large": (200_000, 5_000, 600_000),
+    "xlarge": (330_000, 8_000, 1_000_000),
+}
+
+
+def _selected_sizes():
+    names = [s.strip() for s in os.environ.get("BENCH_SIZES", "small,medium").split(",") if s.strip()]
+    unknown = set(names) - set(SIZES)
+    if unknown:
+        raise pytest.UsageError(f"unknown BENCH_SIZES: {', '.join(sorted(unknown))}")
+    return names
+
+
+@pytest.fixture(scope="session")
+def database():
+    try:
+        server = pymysql.connect(**{k: v for k, v in db_config.items() if k != "database"})
+    except pymysql.err.OperationalError as e:
+        pytest.skip(f"no MariaDB server for the benchmarks: {e}")
+    with server.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB}`")
+    conn = migrate.connect()
+    migrate.migrate(conn, log=lambda *_: None)
+    conn.autocommit(True)
+    try:
+        yield conn
+    finally:
+        conn.close()
+        with server.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS `{BENCH_DB}`")
+        server.close()
+
+
+@pytest.fixture(scope="session", params=_selected_sizes())
+def dataset(request, database):
+    """Reload personnel / section / links at the requested size; returns sample ids."""
+    personnel, sections, links = SIZES[request.param]
+    rng = random.Random(42)
+    with database.cursor() as cur:
+        cur.execute("SET SESSION foreign_key_checks = 0")
+        for table in ("personnel_section", "personnel", "section"):
+            cur.execute(f"TRUNCATE TABLE {table}")
+        cur.execute("SET SESSION foreign_key_checks = 1")
+    generate_dataset.load_rows(database, "section", ("id", "code_section", "label", "unit", "type"),
+                               generate_dataset.gen_sections(rng, 1, sections), "insert", 10_000)
+    generate_dataset.load_rows(database, "personnel", ("id", "matricule", "nom", "qualification", "affectation"),
+                               generate_dataset.gen_personnel(rng, 1, personnel), "insert", 10_000)
+    generate_dataset.load_rows(database, "personnel_section", ("personnel_id", "section_id"),
+                               generate_dataset.gen_links(rng, 1, personnel, 1, sections, links), "insert", 10_000)
+    with database.cursor() as cur:
+        stats.rebuild(cur)
+        cur.execute("UPDATE table_versions SET version = version + 1")
+        cur.execute("ANALYZE TABLE personnel, section, personnel_section")
+        cur.fetchall()
+        cur.execute("SELECT label FROM section WHERE id = 1")
+        section_label = cur.fetchone()["label"]
+    return {
+        "size": request.param,
+        "section_label": section_label,
+        "personnel_ids": rng.sample(range(1, personnel + 1), min(1000, personnel)),
+        "section_ids": rng.sample(range(1, sections + 1), min(1000, sections)),
+    }
+
+
+@pytest.fixture(scope="session")
+def app(database):
+    from main import app
+    from utils import db
+    CACHE_CONFIG["enabled"] = os.environ.get("BENCH_CACHE") == "1"
+    yield app
+    db.close_pool()
+
+
+@pytest.fixture
+def client(app, dataset):
+    return app.test_client()
+
+
+@pytest.fixture(scope="session")
+def admin_headers(database):
+    from utils.auth import generate_token
+    with database.cursor() as cur:
+        cur.execute("SELECT id FROM users WHERE email = 'admin@example.com'")
+        admin_id = cur.fetchone()["id"]
+    return {"Authorization": f"Bearer {generate_token(admin_id, 'admin@example.com', 'admin')}"}
+
+
+@pytest.fixture(scope="session")
+def scoped_headers(database, dataset):
+    """A non-admin user responsible for one section in ten (see utils/scope.py)."""
+    from utils.auth import generate_token
+    from utils.scope import invalidate_scope
+    with database.cursor() as cur:
+        cur.execute("""INSERT IGNORE INTO users (firstname, lastname, email, password, role)
+                       VALUES ('Scoped', 'Bench', 'scoped@example.com', '-', 'customer')""")
+        if cur.rowcount:
+            stats.user_added(cur, "customer")
+        cur.execute("SELECT id FROM users WHERE email = 'scoped@example.com'")
+        user_id = cur.fetchone()["id"]
+        cur.execute("DELETE FROM user_section WHERE user_id = %s", (user_id,))
+        cur.execute("INSERT INTO user_section (user_id, section_id) SELECT %s, id FROM section WHERE id %% 10 = 1",
+                    (user_id,))
+        cur.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'user_section'")
+        cur.execute("ANALYZE TABLE user_section")
+        cur.fetchall()
+    invalidate_scope(user_id)
+    return {"Authorization": f"Bearer {generate_token(user_id, 'scoped@example.com', 'customer')}"}
+
+
+@pytest.fixture(scope="session")
+def unique():
+    """Fresh numbers for the rows created by write benchmarks (users survive dataset reloads)."""
+    return itertools.count(1)
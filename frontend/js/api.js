@@ -10,9 +10,29 @@ export const api = {
   delete: async (url) =>       request("DELETE", url),           // 🔥 suppression
 };
 
+// Dernière réponse connue par URL, revalidée avec If-None-Match (ETag)
+const etagCache = new Map();
+
+// Format compact des listes : noms de colonnes une seule fois + une ligne par tableau.
+// Demandé pour tous les GET ; les routes qui ne le gèrent pas répondent en JSON classique.
+const COLUMNS_MEDIA_TYPE = "application/vnd.columns+json";
+
+// { columns, rows } -> { data: [{...}, ...] } pour que les appelants ne voient qu'un format
+function decodeColumns(payload) {
+  if (!payload || !Array.isArray(payload.columns) || !Array.isArray(payload.rows)) return payload;
+  const { columns, rows, ...rest } = payload;
+  const data = rows.map(row => {
+    const obj = {};
+    for (let i = 0; i < columns.length; i++) obj[columns[i]] = row[i];
+    return obj;
+  });
+  return { ...rest, data };
+}
+
 async function request(method, url, body = null) {
   try {
     const token = localStorage.getItem("token");
+    const cached = method === "GET" ? etagCache.get(url) : null;
     
     // Debug logging
     console.log(`API Request: ${method} ${url}`);
@@ -25,12 +45,25 @@ async function request(method, url, body = null) {
       method,
       headers: {
         "Content-Type": "application/json",
-        ...(token ? { Authorization: "Bearer " + token } : {})
+        ...(method === "GET" ? { Accept: `${COLUMNS_MEDIA_TYPE}, application/json;q=0.9` } : {}),
+        ...(token ? { Authorization: "Bearer " + token } : {}),
+        ...(cached ? { "If-None-Match": cached.etag } : {})
       },
       body: body ? JSON.stringify(body) : null,
+      cache: "no-store", // la revalidation est gérée ici, pas par le cache HTTP du navigateur
     });
 
-    const data = await res.json().catch(() => ({}));
+    // 304 : les données n'ont pas changé côté serveur
+    if (res.status === 304 && cached) {
+      return { ok: true, ...cached.data };
+    }
+
+    const data = decodeColumns(await res.json().catch(() => ({})));
+
+    const etag = res.headers.get("ETag");
+    if (method === "GET" && res.ok && etag) {
+      etagCache.set(url, { etag, data });
+    }
 
     if (!res.ok) {
       console.error(`API Error: ${res.status} ${res.statusText}`, data);
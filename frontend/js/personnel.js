@@ -1,12 +1,29 @@
 import { api } from "./api.js";
 import { loadSections } from "./section.js";
 
-export const loadPersonnel = async () => {
+// Curseur de la page suivante (pagination keyset côté API)
+let nextCursor = null;
+
+// Recherche en cours (?q= matricule / nom, ?section= libellé) ; vide = liste complète
+const search = { q: "", section: "" };
+
+const listUrl = (append) => {
+  const params = new URLSearchParams();
+  if (search.q) params.set("q", search.q);
+  if (search.section) params.set("section", search.section);
+  if (append && nextCursor) params.set("cursor", nextCursor);
+  const path = search.q || search.section ? "/personnel/search" : "/personnel/all";
+  const query = params.toString();
+  return query ? `${path}?${query}` : path;
+};
+
+export const loadPersonnel = async (append = false) => {
   try {
-    const { data } = await api.get("/personnel/all");
+    const { data, next_cursor } = await api.get(listUrl(append));
     const tbody = document.querySelector("#personnelTable");
     if (!tbody) return;
-    tbody.innerHTML = "";
+    if (!append) tbody.innerHTML = "";
+    nextCursor = next_cursor || null;
 
     (data || []).forEach(({ id, matricule, nom, qualification, affectation, sections }) => {
       const tr = document.createElement("tr");
@@ -42,6 +59,12 @@ export const loadPersonnel = async () => {
 
     attachPersonnelActions();
 
+    const loadMore = document.querySelector("#loadMorePersonnel");
+    if (loadMore) {
+      loadMore.classList.toggle("hidden", !nextCursor);
+      loadMore.onclick = () => loadPersonnel(true);
+    }
+
   } catch (err) {
     console.error("❌ Erreur lors du chargement du personnel:", err);
   }
@@ -94,8 +117,9 @@ export const initPersonnelForm = () => {
 };
 
 function attachPersonnelActions() {
-  // 🔹 Supprimer
-  document.querySelectorAll(".deleteBtn").forEach(btn => {
+  // 🔹 Supprimer (seulement les lignes pas encore liées, la liste peut être complétée page par page)
+  document.querySelectorAll(".deleteBtn:not([data-bound])").forEach(btn => {
+    btn.dataset.bound = "1";
     btn.addEventListener("click", async (e) => {
       e.preventDefault();
       e.stopPropagation();
@@ -134,7 +158,8 @@ function attachPersonnelActions() {
   });
 
   // 🔹 Modifier → remplir le formulaire
-  document.querySelectorAll(".editBtn").forEach(btn => {
+  document.querySelectorAll(".editBtn:not([data-bound])").forEach(btn => {
+    btn.dataset.bound = "1";
     btn.addEventListener("click", async () => {
       const id = btn.dataset.id;
       const tr = btn.closest("tr");
@@ -150,38 +175,30 @@ function attachPersonnelActions() {
       document.querySelector("#affectation").value = affectation;
       document.querySelector("#personnelId").value = id;
 
-      // Fetch personnel details to get section assignments
+      // Fetch personnel details (sections included) in a single call
       try {
         console.log(`🔍 Loading personnel details for ID: ${id}`);
         const res = await api.get(`/personnel/${id}`);
         console.log(`📊 Personnel details response:`, res);
         
         if (res.ok && res.data) {
-          // Get section IDs for this personnel
-          console.log(`🔍 Loading sections for personnel ID: ${id}`);
-          const sectionRes = await api.get(`/personnel/${id}/sections`);
-          console.log(`📊 Personnel sections response:`, sectionRes);
-          
-          if (sectionRes.ok && sectionRes.data) {
-            const sectionSelect = document.querySelector("#sectionSelect");
-            // Clear all selections first
-            Array.from(sectionSelect.options).forEach(option => {
-              option.selected = false;
-            });
-            // Select the assigned sections
-            console.log(`🎯 Selecting sections:`, sectionRes.data);
-            sectionRes.data.forEach(sectionId => {
-              const option = sectionSelect.querySelector(`option[value="${sectionId}"]`);
-              if (option) {
-                option.selected = true;
-                console.log(`✅ Selected section ${sectionId}: ${option.textContent}`);
-              } else {
-                console.warn(`❌ Section option not found for ID: ${sectionId}`);
-              }
-            });
-          } else {
-            console.warn(`❌ Failed to load sections for personnel ${id}`);
-          }
+          const sectionSelect = document.querySelector("#sectionSelect");
+          // Clear all selections first
+          Array.from(sectionSelect.options).forEach(option => {
+            option.selected = false;
+          });
+          // Select the assigned sections
+          const sectionIds = (res.data.sections || []).map(s => s.id);
+          console.log(`🎯 Selecting sections:`, sectionIds);
+          sectionIds.forEach(sectionId => {
+            const option = sectionSelect.querySelector(`option[value="${sectionId}"]`);
+            if (option) {
+              option.selected = true;
+              console.log(`✅ Selected section ${sectionId}: ${option.textContent}`);
+            } else {
+              console.warn(`❌ Section option not found for ID: ${sectionId}`);
+            }
+          });
         } else {
           console.warn(`❌ Failed to load personnel details for ID: ${id}`);
         }
@@ -196,9 +213,27 @@ function attachPersonnelActions() {
   });
 }
 
+// Recherche côté serveur, déclenchée 250 ms après la dernière frappe
+const initPersonnelSearch = () => {
+  let timer = null;
+  ["#personnelSearch", "#personnelSectionFilter"].forEach(selector => {
+    const input = document.querySelector(selector);
+    if (!input) return;
+    input.addEventListener("input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        search.q = (document.querySelector("#personnelSearch")?.value || "").trim();
+        search.section = (document.querySelector("#personnelSectionFilter")?.value || "").trim();
+        loadPersonnel();
+      }, 250);
+    });
+  });
+};
+
 // Charger sections + personnels
 document.addEventListener("DOMContentLoaded", () => {
   loadSections();
   loadPersonnel();
   initPersonnelForm();
+  initPersonnelSearch();
 });
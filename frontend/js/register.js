@@ -2,28 +2,47 @@ import { api } from "./api.js";
 
 let mode = "add"; // add | update
 
+// Curseur de la page suivante (pagination keyset côté API)
+let nextCursor = null;
+
+// Recherche en cours (?q= préfixe e-mail / prénom / nom, ?role=, ?status=)
+const filters = { q: "", role: "", status: "" };
+
+const usersUrl = (append) => {
+  const params = new URLSearchParams();
+  Object.entries(filters).forEach(([key, value]) => value && params.set(key, value));
+  if (append && nextCursor) params.set("cursor", nextCursor);
+  const query = params.toString();
+  return query ? `/auth/users?${query}` : "/auth/users";
+};
+
 document.addEventListener("DOMContentLoaded", () => {
   // Charger la liste des utilisateurs
   loadUsers();
 
   // Initialiser le formulaire
   initUserForm();
+  initUserSearch();
 });
 
-export async function loadUsers() {
+export async function loadUsers(append = false) {
   try {
-    const res = await api.get("/auth/users");
+    const res = await api.get(usersUrl(append));
     const tbody = document.querySelector("#userTable");
     if (!tbody) return;
-    tbody.innerHTML = "";
+    if (!append) tbody.innerHTML = "";
 
     if (!res.ok) {
       console.error("Erreur chargement utilisateurs:", res.error);
-      tbody.innerHTML = `<tr><td colspan="6" class="p-2 text-center text-red-600 text-sm">❌ ${res.error || "Erreur de chargement"}</td></tr>`;
+      tbody.innerHTML = `<tr><td colspan="7" class="p-2 text-center text-red-600 text-sm">❌ ${res.error || "Erreur de chargement"}</td></tr>`;
       return;
     }
 
-    (res.data || []).forEach(({ id, firstname, lastname, email, role }) => {
+    nextCursor = res.next_cursor || null;
+    const total = document.querySelector("#userTotal");
+    if (total) total.textContent = res.total == null ? "" : `${res.total} utilisateur(s)`;
+
+    (res.data || []).forEach(({ id, firstname, lastname, email, role, status }) => {
       const tr = document.createElement("tr");
       tr.innerHTML = `
         <td class="p-1 border text-xs">${id}</td>
@@ -31,6 +50,7 @@ export async function loadUsers() {
         <td class="p-1 border text-xs">${lastname}</td>
         <td class="p-1 border text-xs">${email}</td>
         <td class="p-1 border text-xs">${role}</td>
+        <td class="p-1 border text-xs">${status || "-"}</td>
         <td class="p-1 border text-xs text-center">
           <button class="editBtn bg-blue-500 hover:bg-blue-600 text-white text-xs px-1 py-0.5 rounded mr-1" 
                   data-id="${id}" data-firstname="${firstname}" data-lastname="${lastname}" data-email="${email}" data-role="${role}">✏️</button>
@@ -41,6 +61,12 @@ export async function loadUsers() {
     });
 
     attachUserActions();
+
+    const loadMore = document.querySelector("#loadMoreUsers");
+    if (loadMore) {
+      loadMore.classList.toggle("hidden", !nextCursor);
+      loadMore.onclick = () => loadUsers(true);
+    }
   } catch (err) {
     console.error("❌ Exception chargement utilisateurs:", err);
   }
@@ -96,6 +122,24 @@ function initUserForm() {
   });
 }
 
+// Recherche côté serveur, déclenchée 250 ms après la dernière frappe
+function initUserSearch() {
+  let timer = null;
+  ["#userSearch", "#userRoleFilter", "#userStatusFilter"].forEach((selector) => {
+    const input = document.querySelector(selector);
+    if (!input) return;
+    input.addEventListener(input.tagName === "SELECT" ? "change" : "input", () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        filters.q = (document.querySelector("#userSearch")?.value || "").trim();
+        filters.role = document.querySelector("#userRoleFilter")?.value || "";
+        filters.status = document.querySelector("#userStatusFilter")?.value || "";
+        loadUsers();
+      }, 250);
+    });
+  });
+}
+
 function attachUserActions() {
   document.querySelectorAll(".editBtn").forEach((btn) => {
     btn.addEventListener("click", () => {
@@ -8,32 +8,60 @@ document.addEventListener("DOMContentLoaded", () => {
   initSectionForm && initSectionForm();
 });
 
-export const loadSections = async () => {
+// Curseur de la page suivante du tableau (pagination keyset côté API)
+let nextCursor = null;
+
+// Toutes les sections pour le menu déroulant (parcourt toutes les pages)
+const fetchAllSections = async () => {
+  const all = [];
+  let cursor = null;
+  do {
+    const query = "?limit=1000" + (cursor ? `&cursor=${encodeURIComponent(cursor)}` : "");
+    const res = await api.get("/section/all" + query);
+    if (!res.ok) break;
+    all.push(...(res.data || []));
+    cursor = res.next_cursor;
+  } while (cursor);
+  return all;
+};
+
+// "A, B, C (+12)" : l'API renvoie les premiers noms et le total
+const formatPersonnels = (personnels, count) => {
+  if (!Array.isArray(personnels) || personnels.length === 0) return "-";
+  const more = (count || 0) - personnels.length;
+  return personnels.join(", ") + (more > 0 ? ` (+${more})` : "");
+};
+
+export const loadSections = async (append = false) => {
   try {
-    const { data } = await api.get("/section/all");
     const select = document.querySelector("#sectionSelect");
     const tbody = document.querySelector("#sectionTable");
 
-    if (select) select.innerHTML = "";
-    if (tbody) tbody.innerHTML = "";
+    // Dropdown
+    if (select && !append) {
+      select.innerHTML = "";
+      (await fetchAllSections()).forEach(({ id, label, type, unit }) => {
+        select.append(new Option(`${label} (${type} - ${unit})`, id));
+      });
+    }
+
+    if (!tbody) return;
 
-    data?.forEach(({ id, label, type, unit, personnels }) => {
-      // Dropdown
-      if (select) {
-        const opt = new Option(`${label} (${type} - ${unit})`, id);
-        select.append(opt);
-      }
+    const query = append && nextCursor ? `?cursor=${encodeURIComponent(nextCursor)}` : "";
+    const { data, next_cursor } = await api.get("/section/all" + query);
+    if (!append) tbody.innerHTML = "";
+    nextCursor = next_cursor || null;
 
+    data?.forEach(({ id, label, type, unit, personnels, personnel_count }) => {
       // Table
-      if (tbody) {
-        const tr = document.createElement("tr");
-        tr.innerHTML = `
+      const tr = document.createElement("tr");
+      tr.innerHTML = `
          <tr class="text-xs">
             <td class="p-1 border">${id}</td>
             <td class="p-1 border">${label}</td>
             <td class="p-1 border">${type}</td>
             <td class="p-1 border">${unit}</td>
-            <td class="p-1 border">${personnels ?? "-"}</td>
+            <td class="p-1 border">${formatPersonnels(personnels, personnel_count)}</td>
             <td class="p-1 border text-center">
               <button class="editBtn bg-blue-500 text-white px-1 py-0.5 rounded text-xs mr-1" 
                       data-id="${id}" data-label="${label}" data-type="${type}" data-unit="${unit}">
@@ -47,12 +75,18 @@ export const loadSections = async () => {
           </tr>
 
         `;
-        tbody.append(tr);
-      }
+      tbody.append(tr);
     });
 
+    const loadMore = document.querySelector("#loadMoreSections");
+    if (loadMore) {
+      loadMore.classList.toggle("hidden", !nextCursor);
+      loadMore.onclick = () => loadSections(true);
+    }
+
     // Bind Edit buttons
-    document.querySelectorAll(".editBtn").forEach((btn) => {
+    document.querySelectorAll("#sectionTable .editBtn:not([data-bound])").forEach((btn) => {
+      btn.dataset.bound = "1";
       btn.addEventListener("click", (e) => {
         const { id, label, type, unit } = e.target.dataset;
         const row = e.target.closest('tr');
@@ -69,7 +103,8 @@ export const loadSections = async () => {
     });
 
     // Bind Delete buttons
-    document.querySelectorAll(".deleteBtn").forEach((btn) => {
+    document.querySelectorAll("#sectionTable .deleteBtn:not([data-bound])").forEach((btn) => {
+      btn.dataset.bound = "1";
       btn.addEventListener("click", async (e) => {
         e.preventDefault();
         e.stopPropagation();
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bulk-load a large synthetic dataset (personnel, sections, links).
+
+    python generate_dataset.py --personnel 1000000 --sections 50000 --links 10000000
+
+Targets the database of api/config.py (override with DB_NAME=... or
+--database). Rows are appended after the existing ones; --reset empties
+personnel, section and personnel_section first. Distributions are skewed
+like real data: department sizes, section popularity and links per employee
+follow Zipf / exponential laws, names are drawn from common French names.
+The /stats headcount counters are recomputed at the end.
+
+--method load (default) streams TSV chunks through LOAD DATA LOCAL INFILE
+(the server needs local_infile=ON); --method insert uses multi-row INSERTs.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+import pymysql  # noqa: E402
+from config import db_config  # noqa: E402
+from utils import stats  # noqa: E402
+
+LAST_NAMES = [
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy", "Moreau",
+    "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux", "Vincent", "Fournier",
+    "Morel", "Girard", "André", "Lefèvre", "Mercier", "Dupont", "Lambert", "Bonnet", "François", "Martinez",
+    "Benali", "Haddad", "Mansouri", "Boudiaf", "Saidi", "Touati", "Belkacem", "Cherif", "Hamidi", "Khelifi",
+]
+FIRST_NAMES = [
+    "Jean", "Marie", "Pierre", "Sophie", "Michel", "Nathalie", "Philippe", "Isabelle", "Alain", "Catherine",
+    "Nicolas", "Sandrine", "Julien", "Camille", "Thomas", "Léa", "Karim", "Amina", "Yacine", "Samia",
+    "Farid", "Nadia", "Mehdi", "Leïla", "Hugo", "Chloé", "Lucas", "Inès", "Omar", "Sarah",
+]
+QUALIFICATIONS = [  # (label, weight)
+    ("Opérateur", 30), ("Technicien", 20), ("Agent administratif", 15), ("Comptable", 10),
+    ("Ingénieur", 8), ("Chef d'équipe", 6), ("Cadre", 5), ("RH Manager", 3), ("Directeur", 1),
+]
+DEPARTMENTS = [
+    "Production", "Maintenance", "Logistique", "Comptabilité", "Ressources Humaines", "Commercial",
+    "Qualité", "Informatique", "Achats", "Direction", "Juridique", "Sécurité", "Recherche", "Finance",
+    "Communication", "Formation", "Magasin", "Transport", "Audit", "Contrôle de gestion",
+]
+SECTION_TYPES = [("Operational", 50), ("Administrative", 30), ("Financial", 15), ("Technical", 5)]
+
+
+def zipf_cum_weights(n, s):
+    return list(itertools.accumulate(1 / (i + 1) ** s for i in range(n)))
+
+
+def weighted(pairs):
+    labels = [p[0] for p in pairs]
+    return labels, list(itertools.accumulate(p[1] for p in pairs))
+
+
+def gen_sections(rng, first_id, count):
+    types, type_weights = weighted(SECTION_TYPES)
+    dept_weights = zipf_cum_weights(len(DEPARTMENTS), 1.0)
+    for i in range(count):
+        sid = first_id + i
+        dept = rng.choices(DEPARTMENTS, cum_weights=dept_weights)[0]
+        unit = dept[:4].upper()
+        yield (sid, 1_000_000 + sid, f"{dept} - centre {sid}", unit, rng.choices(types, cum_weights=type_weights)[0])
+
+
+def gen_personnel(rng, first_id, count):
+    quals, qual_weights = weighted(QUALIFICATIONS)
+    dept_weights = zipf_cum_weights(len(DEPARTMENTS), 1.0)
+    for i in range(count):
+        pid = first_id + i
+        nom = f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)}"
+        yield (pid, f"G{pid:09d}", nom, rng.choices(quals, cum_weights=qual_weights)[0],
+               rng.choices(DEPARTMENTS, cum_weights=dept_weights)[0])
+
+
+def gen_links(rng, first_personnel, personnel, first_section, sections, links):
+    """About `links` distinct (personnel_id, section_id) pairs; popular sections get most links."""
+    order = list(range(first_section, first_section + sections))
+    rng.shuffle(order)   # popularity must not follow the id order
+    cum = zipf_cum_weights(sections, 0.8)
+    mean = links / personnel if personnel else 0
+    for pid in range(first_personnel, first_personnel + personnel):
+        k = min(sections, int(rng.expovariate(1 / mean)) + 1) if mean else 0
+        for sid in set(rng.choices(order, cum_weights=cum, k=k)):
+            yield (pid, sid)
+
+
+def _tsv_value(v):
+    return str(v).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def load_rows(conn, table, columns, rows, method, batch):
+    """Load `rows` (iterable of tuples) in chunks; returns the row count."""
+    total = 0
+    cols = ", ".join(columns)
+    with conn.cursor() as cur:
+        while True:
+            chunk = list(itertools.islice(rows, batch))
+            if not chunk:
+                break
+            if method == "load":
+                with tempfile.NamedTemporaryFile("w", suffix=".tsv", encoding="utf-8", delete=False) as f:
+                    for row in chunk:
+                        f.write("\t".join(map(_tsv_value, row)) + "\n")
+                try:
+                    cur.execute(
+                        f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                        f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({cols})",
+                        (f.name,),
+                    )
+                finally:
+                    os.unlink(f.name)
+            else:
+                placeholders = ", ".join(["%s"] * len(columns))
+                cur.executemany(f"INSERT INTO {table} ({cols}) VALUES ({placeholders})", chunk)
+            conn.commit()
+            total += len(chunk)
+            print(f"\r  {table}: {total:,} rows", end="", flush=True)
+    print()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--personnel", type=int, default=100_000)
+    parser.add_argument("--sections", type=int, default=5_000)
+    parser.add_argument("--links", type=int, default=1_000_000, help="approximate number of links")
+    parser.add_argument("--method", choices=("load", "insert"), default="load")
+    parser.add_argument("--batch", type=int, default=100_000, help="rows per LOAD DATA file / INSERT batch")
+    parser.add_argument("--database", default=db_config["database"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="empty personnel, section and personnel_section first")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = pymysql.connect(**{**db_config, "database": args.database},
+                           local_infile=args.method == "load",
+                           cursorclass=pymysql.cursors.DictCursor)
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+            if args.reset:
+                for table in ("personnel_section", "personnel", "section"):
+                    cur.execute(f"TRUNCATE TABLE {table}")
+            cur.execute("SELECT COALESCE(MAX(id), 0) + 1 AS next FROM personnel")
+            first_personnel = cur.fetchone()["next"]
+            cur.execute("SELECT COALESCE(MAX(id), 0) + 1 AS next FROM section")
+            first_section = cur.fetchone()["next"]
+
+        load_rows(conn, "section", ("id", "code_section", "label", "unit", "type"),
+                  gen_sections(rng, first_section, args.sections), args.method, args.batch)
+        load_rows(conn, "personnel", ("id", "matricule", "nom", "qualification", "affectation"),
+                  gen_personnel(rng, first_personnel, args.personnel), args.method, args.batch)
+        load_rows(conn, "personnel_section", ("personnel_id", "section_id"),
+                  gen_links(rng, first_personnel, args.personnel, first_section, args.sections, args.links),
+                  args.method, args.batch)
+
+        with conn.cursor() as cur:
+            cur.execute("SET SESSION foreign_key_checks = 1, unique_checks = 1")
+            print("  recomputing headcount counters")
+            stats.rebuild(cur)
+            try:
+                # Running API workers must not serve cached listings / ETags of the old data
+                cur.execute("UPDATE table_versions SET version = version + 1")
+            except pymysql.err.ProgrammingError:
+                pass
+            cur.execute("ANALYZE TABLE personnel, section, personnel_section")
+            cur.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"done in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
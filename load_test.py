@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Mixed-traffic load test against a running API.
+
+Start the API (python api/serve.py, ideally on a dataset from
+generate_dataset.py), then:
+
+    python load_test.py --users 32 --seconds 60 --mix list=50,get=25,update=10,sections=10,login=5
+
+Each virtual user logs in, then loops over operations drawn from --mix:
+  list      GET /personnel/all (first pages, random filters, cursor follow-up)
+  get       GET /personnel/<id>
+  update    the frontend edit flow: GET /personnel/<id> (sections included),
+            then PUT /personnel/<id> with the same values (admin account)
+  sections  GET /section/all
+  login     POST /auth/login
+Throughput and latency percentiles are reported per endpoint.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+API_BASE_URL = "http://127.0.0.1:3000"
+AFFECTATIONS = ["Production", "Maintenance", "Logistique", "Comptabilité", "Direction"]
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"unknown operation(s) in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, start, response):
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            if response is not None and response.status_code < 400:
+                self.latencies[endpoint].append(elapsed)
+            else:
+                self.errors[endpoint] += 1
+
+
+class VirtualUser:
+    def __init__(self, args, stats, ids, rng):
+        self.args = args
+        self.stats = stats
+        self.ids = ids
+        self.rng = rng
+        self.session = requests.Session()
+
+    def call(self, endpoint, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, API_BASE_URL + path, timeout=30, **kwargs)
+        except requests.RequestException:
+            response = None
+        self.stats.record(endpoint, start, response)
+        return response
+
+    def login(self):
+        r = self.call("POST /auth/login", "POST", "/auth/login",
+                      json={"email": self.args.email, "password": self.args.password})
+        if r is not None and r.status_code == 200:
+            self.session.headers["Authorization"] = f"Bearer {r.json()['token']}"
+
+    def list(self):
+        params = {"limit": self.rng.choice([20, 50, 100])}
+        if self.rng.random() < 0.3:
+            params["affectation"] = self.rng.choice(AFFECTATIONS)
+        r = self.call("GET /personnel/all", "GET", "/personnel/all", params=params)
+        if r is not None and r.status_code == 200 and r.json().get("next_cursor") and self.rng.random() < 0.5:
+            params["cursor"] = r.json()["next_cursor"]
+            self.call("GET /personnel/all", "GET", "/personnel/all", params=params)
+
+    def get(self):
+        self.call("GET /personnel/<id>", "GET", f"/personnel/{self.rng.choice(self.ids)}")
+
+    def sections(self):
+        self.call("GET /section/all", "GET", "/section/all", params={"limit": self.rng.choice([20, 100])})
+
+    def update(self):
+        pid = self.rng.choice(self.ids)
+        r = self.call("GET /personnel/<id>", "GET", f"/personnel/{pid}")
+        if r is None or r.status_code != 200:
+            return
+        row = r.json()["data"]
+        body = {k: row[k] for k in ("matricule", "nom", "qualification", "affectation")}
+        body["sections"] = [s["id"] for s in row["sections"]]
+        self.call("PUT /personnel/<id>", "PUT", f"/personnel/{pid}", json=body)
+
+    def run(self, mix, stop_at):
+        self.login()
+        names, weights = list(mix), list(mix.values())
+        while time.monotonic() < stop_at:
+            getattr(self, self.rng.choices(names, weights)[0])()
+
+
+OPERATIONS = ("list", "get", "update", "sections", "login")
+
+
+def sample_ids(args, count):
+    """Personnel ids to pick from, read through the API."""
+    session = requests.Session()
+    r = session.post(f"{API_BASE_URL}/auth/login", json={"email": args.email, "password": args.password})
+    r.raise_for_status()
+    session.headers["Authorization"] = f"Bearer {r.json()['token']}"
+    ids, cursor = [], None
+    while len(ids) < count:
+        params = {"limit": 1000, **({"cursor": cursor} if cursor else {})}
+        page = session.get(f"{API_BASE_URL}/personnel/all", params=params).json()
+        ids.extend(row["id"] for row in page.get("data", []))
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+    if not ids:
+        raise SystemExit("no personnel found; load data with generate_dataset.py first")
+    return ids
+
+
+def main():
+    global API_BASE_URL
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=API_BASE_URL)
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--mix", default="list=50,get=25,update=10,sections=10,login=5")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--id-sample", type=int, default=5000, help="personnel ids sampled for get/update")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    API_BASE_URL = args.url.rstrip("/")
+
+    mix = parse_mix(args.mix)
+    ids = sample_ids(args, args.id_sample)
+    stats = Stats()
+    stop_at = time.monotonic() + args.seconds
+    users = [VirtualUser(args, stats, ids, random.Random(args.seed + i)) for i in range(args.users)]
+    threads = [threading.Thread(target=u.run, args=(mix, stop_at)) for u in users]
+
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+
+    print(f"{args.users} users, {elapsed:.1f}s, mix {args.mix}\n")
+    print(f"{'endpoint':<30} {'ok':>7} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    total = 0
+    for endpoint in sorted(set(stats.latencies) | set(stats.errors)):
+        lat = stats.latencies[endpoint]
+        total += len(lat) + stats.errors[endpoint]
+        print(f"{endpoint:<30} {len(lat):>7} {stats.errors[endpoint]:>5} {len(lat) / elapsed:>8.1f} "
+              f"{percentile(lat, 50):>8.1f} {percentile(lat, 95):>8.1f} {percentile(lat, 99):>8.1f} "
+              f"{max(lat) if lat else float('nan'):>8.1f}")
+    print(f"\ntotal: {total / elapsed:.1f} req/s (latencies in ms)")
+
+
+if __name__ == "__main__":
+    main()
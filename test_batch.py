@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""POST /batch against a running API: values rejected by MariaDB are per-operation errors."""
+
+import requests
+
+API_BASE_URL = "http://127.0.0.1:3000"
+
+
+def login():
+    res = requests.post(f"{API_BASE_URL}/auth/login", json={
+        "email": "admin@example.com",
+        "password": "admin123"
+    })
+    res.raise_for_status()
+    return res.json().get("token")
+
+
+def headers(token):
+    return {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+
+
+def batch(h, mode, operations):
+    r = requests.post(f"{API_BASE_URL}/batch", json={"mode": mode, "operations": operations}, headers=h)
+    print(f"{mode}:", r.status_code, r.text)
+    return r
+
+
+def main():
+    h = headers(login())
+    good = {"op": "create", "entity": "section", "ref": "ok",
+            "data": {"code_section": 9101, "label": "Batch QA", "unit": "QA", "type": "Operational"}}
+    too_long = {"op": "create", "entity": "personnel",
+                "data": {"matricule": "BQA1", "nom": "x" * 1000, "qualification": "QA", "affectation": "QA"}}
+    out_of_range = {"op": "create", "entity": "section",
+                    "data": {"code_section": 10 ** 20, "label": "Batch QA 2", "unit": "QA", "type": "Operational"}}
+
+    print("1) best_effort: the valid operation commits, the two others fail with 400")
+    r = batch(h, "best_effort", [good, too_long, out_of_range])
+    results = r.json().get("results", [])
+    assert r.status_code == 200, r.status_code
+    assert [res["status"] for res in results] == [201, 400, 400], results
+    section_id = results[0]["id"]
+
+    print("2) atomic: nothing commits, the failure is reported as 400")
+    r = batch(h, "atomic", [{"op": "delete", "entity": "section", "id": section_id}, too_long])
+    assert r.status_code == 400, r.status_code
+    assert [res["status"] for res in r.json()["results"]] == [200, 400], r.json()
+
+    print("3) cleanup")
+    r = batch(h, "atomic", [{"op": "delete", "entity": "section", "id": section_id}])
+    assert r.status_code == 200, r.status_code
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()